@@ -1,18 +1,82 @@
 
 import sys
+from bisect import bisect_left
 from mutatorMath.objects.error import MutatorError
-from mutatorMath.objects.location import Location, biasFromLocations
+from mutatorMath.objects.location import Location, LocationArray
 import mutatorMath.objects.mutator
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 def noBend(loc): return loc
 
 class WarpMutator(mutatorMath.objects.mutator.Mutator):
+    # Bender uses _WarpMap now, kept for compatibility.
     def __call__(self, value):
         if isinstance(value, tuple):
             # handle split location
             return self.makeInstance(Location(w=value[0])), self.makeInstance(Location(w=value[1]))
         return self.makeInstance(Location(w=value))
 
+
+class _WarpMap(object):
+    """
+        A warp map as sorted breakpoints. Linear between the breakpoints
+        and extrapolated from the first and last segments, the same as a
+        WarpMutator for the map, without making locations.
+    """
+
+    __slots__ = ['xs', 'ys']
+
+    def __init__(self, warpMap):
+        points = sorted(dict(warpMap).items())
+        self.xs = [x for x, y in points]
+        self.ys = [y for x, y in points]
+
+    def __repr__(self):
+        return "<%s %s>" % (self.__class__.__name__, list(zip(self.xs, self.ys)))
+
+    def __getstate__(self):
+        return self.xs, self.ys
+
+    def __setstate__(self, state):
+        self.xs, self.ys = state
+
+    def __call__(self, value):
+        if isinstance(value, tuple):
+            # handle split location
+            return self.bendValue(value[0]), self.bendValue(value[1])
+        return self.bendValue(value)
+
+    def bendValue(self, value):
+        xs = self.xs
+        ys = self.ys
+        if len(xs) == 1:
+            return ys[0]
+        index = bisect_left(xs, value)
+        if index < len(xs) and xs[index] == value:
+            return ys[index]
+        # the segment around the value, or the first or last segment
+        index = min(max(index, 1), len(xs)-1)
+        x0 = xs[index-1]
+        y0 = ys[index-1]
+        return y0 + (value-x0) * (ys[index]-y0) / float(xs[index]-x0)
+
+    def bendArray(self, values):
+        """ Bend a numpy array of values. """
+        xs = numpy.array(self.xs, dtype=float)
+        ys = numpy.array(self.ys, dtype=float)
+        if len(xs) == 1:
+            return numpy.full(values.shape, ys[0])
+        result = numpy.interp(values, xs, ys)
+        below = values < xs[0]
+        above = values > xs[-1]
+        result[below] = ys[0] + (values[below]-xs[0]) * (ys[1]-ys[0]) / (xs[1]-xs[0])
+        result[above] = ys[-2] + (values[above]-xs[-2]) * (ys[-1]-ys[-2]) / (xs[-1]-xs[-2])
+        return result
+
 """
 
     A warpmap is a list of tuples that describe non-linear behaviour
@@ -71,34 +135,7 @@ class Bender(object):
             warpMap = [(minimum,minimum)] + warpMap
         if not sum([a==maximum for a, b in warpMap]):
             warpMap.append((maximum,maximum))
-        items = []
-        for x, y in warpMap:
-            items.append((Location(w=x), y))
-        m = WarpMutator()
-        items.sort()
-        bias = biasFromLocations([loc for loc, obj in items], True)
-        m.setBias(bias)
-        n = None
-        ofx = []
-        onx = []
-        for loc, obj in items:
-            if (loc-bias).isOrigin():
-                m.setNeutral(obj)
-                break
-        if m.getNeutral() is None:
-            raise MutatorError("Did not find a neutral for this system", m)
-        for loc, obj in items:
-            lb = loc-bias
-            if lb.isOrigin(): continue
-            if lb.isOnAxis():
-                onx.append((lb, obj-m.getNeutral()))
-            else:
-                ofx.append((lb, obj-m.getNeutral()))
-        for loc, obj in onx:
-            m.addDelta(loc, obj, punch=False,  axisOnly=True)
-        for loc, obj in ofx:
-            m.addDelta(loc, obj, punch=True,  axisOnly=True)
-        self.warps[axisName] = m
+        self.warps[axisName] = _WarpMap(warpMap)
 
     def __call__(self, loc):
         # bend a location according to the defined warps
@@ -115,6 +152,42 @@ class Bender(object):
                 raise MutatorError("A warpfunction \"%s\" (for axis \"%s\") raised \"%s\" at location %s"%(str(warp), dim, ex, loc.asString()), loc)
         return new
 
+    def bendMany(self, locations):
+        # bend all locations in a LocationArray, return a new LocationArray
+        new = locations.copy()
+        registry = locations.registry
+        for dim, warp in self.warps.items():
+            if warp is None or dim not in registry:
+                continue
+            index = registry.index(dim)
+            if index >= new.x.shape[1]:
+                continue
+            x = new.x[:, index]
+            y = new.y[:, index]
+            present = ~numpy.isnan(x)
+            split = ~numpy.isnan(y)
+            if isinstance(warp, _WarpMap):
+                x[present] = warp.bendArray(x[present])
+                y[split] = warp.bendArray(y[split])
+                continue
+            # warp functions get one value or one split tuple at a time
+            for row in numpy.flatnonzero(present):
+                if split[row]:
+                    value = float(x[row]), float(y[row])
+                else:
+                    value = float(x[row])
+                try:
+                    value = warp(value)
+                except:
+                    ex_type, ex, tb = sys.exc_info()
+                    loc = locations[int(row)]
+                    raise MutatorError("A warpfunction \"%s\" (for axis \"%s\") raised \"%s\" at location %s"%(str(warp), dim, ex, loc.toLocation().asString()), loc)
+                if isinstance(value, tuple):
+                    x[row], y[row] = value
+                else:
+                    x[row] = value
+        return new
+
 if __name__ == "__main__":
     # no bender
     assert noBend(Location(a=1234)) == Location(a=1234)
@@ -191,6 +264,15 @@ if __name__ == "__main__":
     assert b(Location(aaaa=100)) == Location(aaaa=200)
     assert b(Location(bbbb=100)) == Location(bbbb=10000)
 
+    # bend many locations at once
+    w = {'aaaa':{'map': [(0, 100), (500, 200), (600, 600)], 'name':'aaaaAxis', 'tag':'aaaa', 'minimum':0, 'maximum':600, 'default':0},
+         'bbbb':{'map': warpFunc_1, 'name':'bbbbAxis', 'tag':'bbbb', 'minimum':0, 'maximum':1000, 'default':0},
+        }
+    b = Bender(w)
+    locations = [Location(aaaa=(100, 200), bbbb=3), Location(aaaa=750), Location(bbbb=(1, 2)), Location(cccc=1)]
+    assert b.bendMany(LocationArray(locations)).toLocations() == [b(loc) for loc in locations]
+    assert b.bendMany(LocationArray(locations)).toLocations()[1] == Location(aaaa=1200)
+
     # # see if the errors are caught and reported:
     try:
         b(Location(c=-1))
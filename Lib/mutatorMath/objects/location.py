@@ -2,13 +2,23 @@
 from __future__ import print_function, division
 import math, sys
 import itertools, operator
+import weakref
+import heapq
+import struct
 
 from mutatorMath import __version__
+from mutatorMath.objects.error import MutatorError
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 _EPSILON = sys.float_info.epsilon
 
-__all__ =  ["Location", "sortLocations"]
+__all__ =  ["Location", "FrozenLocation", "AxisRegistry", "ArrayLocation", "LocationArray", "LocationTree", "sortLocations",
+    "locationsToBytes", "locationsFromBytes"]
 
 
 def numberToString(value):
@@ -138,6 +148,26 @@ class Location(dict):
             except TypeError:
                 self[key] = tuple([float(v) for v in value])
         
+    def fromBytes(self, data):
+        """
+        Read the coordinates from bytes made by toBytes.
+        ::
+
+            >>> l = Location()
+            >>> l.fromBytes(Location(pop=1, snap=(-100, 0.5)).toBytes())
+            >>> print(l)
+            <Location pop:1, snap:(-100.000,0.500) >
+
+        """
+        locations = locationsFromBytes(data)
+        if len(locations) != 1:
+            raise MutatorError("The data has %d locations, not 1." % len(locations), None)
+        self.update(locations[0])
+
+    def toBytes(self):
+        """Return the location as bytes, see locationsToBytes."""
+        return locationsToBytes([self])
+
     def asTuple(self):
         """Return the location as a tuple.
         Sort the dimension names alphabetically.
@@ -371,10 +401,7 @@ class Location(dict):
             >>> l.isOnAxis() is None
             True
         """     
-        new = self.__class__()
-        new.update(self)
-        s = new.strip()
-        dims = list(s.keys())
+        dims = list(self.strip().keys())
         if len(dims)> 1:
             return False
         elif len(dims)==1:
@@ -603,6 +630,943 @@ class Location(dict):
         return new
 
 
+def _valueType(value):
+    if isinstance(value, tuple):
+        return tuple([type(v) for v in value])
+    return type(value)
+
+
+def _thawed(method):
+    # run a Location method on a mutable copy
+    def thawed(self, *args, **kwargs):
+        return method(Location(self), *args, **kwargs)
+    thawed.__name__ = method.__name__
+    return thawed
+
+
+_NOTSET = object()
+_frozenLocations = weakref.WeakValueDictionary()
+
+
+class FrozenLocation(Location):
+    """
+    An immutable Location that can be used as a dict key.
+    The sorted tuple and the hash are made once, isOrigin, isOnAxis and
+    isAmbivalent are calculated once. Identical locations are interned,
+    making a FrozenLocation that exists already returns the same object.
+    ::
+
+        >>> l = FrozenLocation(pop=1, snap=0)
+        >>> l
+        <FrozenLocation pop:1, snap:0 >
+        >>> l is FrozenLocation(Location(snap=0, pop=1))
+        True
+        >>> l == Location(pop=1, snap=0)
+        True
+        >>> {l: 'a'}[FrozenLocation(pop=1, snap=0)]
+        'a'
+        >>> l.asTuple()
+        (('pop', 1), ('snap', 0))
+        >>> l.isOnAxis()
+        'pop'
+        >>> l['pop'] = 2
+        Traceback (most recent call last):
+            ...
+        TypeError: FrozenLocation can not be changed.
+
+    Operations that make a new location return a mutable Location.
+    ::
+
+        >>> l + Location(crackle=1)
+        <Location crackle:1, pop:1, snap:0 >
+        >>> l.copy()['pop'] = 2
+        >>> Location(l)
+        <Location pop:1, snap:0 >
+    """
+
+    __slots__ = ['_tuple', '_hash', '_isOrigin', '_isOnAxis', '_isAmbivalent']
+
+    def __new__(cls, *args, **kwargs):
+        if len(args) == 1 and not kwargs and type(args[0]) is cls:
+            return args[0]
+        locationTuple = tuple(sorted(dict(*args, **kwargs).items()))
+        key = locationTuple, tuple([_valueType(v) for k, v in locationTuple])
+        self = _frozenLocations.get(key)
+        if self is None:
+            self = dict.__new__(cls)
+            dict.update(self, locationTuple)
+            self._tuple = locationTuple
+            self._hash = hash(locationTuple)
+            self._isOrigin = self._isOnAxis = self._isAmbivalent = _NOTSET
+            self = _frozenLocations.setdefault(key, self)
+        return self
+
+    def __init__(self, *args, **kwargs):
+        # the values are set in __new__
+        pass
+
+    def __reduce__(self):
+        return self.__class__, (self._tuple,)
+
+    def __hash__(self):
+        return self._hash
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("%s can not be changed." % self.__class__.__name__)
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    update = setdefault = pop = popitem = clear = _immutable
+    expand = fromTuple = fromBytes = _immutable
+
+    copy = _thawed(Location.copy)
+    strip = _thawed(Location.strip)
+    common = _thawed(Location.common)
+    split = _thawed(Location.split)
+    spliceX = _thawed(Location.spliceX)
+    spliceY = _thawed(Location.spliceY)
+    transform = _thawed(Location.transform)
+    __add__ = _thawed(Location.__add__)
+    __sub__ = _thawed(Location.__sub__)
+    __mul__ = __rmul__ = _thawed(Location.__mul__)
+
+    def asTuple(self):
+        return self._tuple
+
+    def isOrigin(self):
+        if self._isOrigin is _NOTSET:
+            self._isOrigin = Location.isOrigin(self)
+        return self._isOrigin
+
+    def isOnAxis(self):
+        if self._isOnAxis is _NOTSET:
+            self._isOnAxis = Location.isOnAxis(self)
+        return self._isOnAxis
+
+    def isAmbivalent(self, dim=None):
+        if dim is not None:
+            return Location.isAmbivalent(self, dim)
+        if self._isAmbivalent is _NOTSET:
+            self._isAmbivalent = Location.isAmbivalent(self)
+        return self._isAmbivalent
+
+
+class AxisRegistry(object):
+    """
+    Dense indices for axis names, in the order the axes are added.
+    ArrayLocations with the same registry have their values in the same
+    order, share one registry for all locations of a designspace.
+    ::
+
+        >>> r = AxisRegistry(['weight', 'width'])
+        >>> r.index('width')
+        1
+        >>> a = r.fromLocation(Location(width=(1, 2), weight=10))
+        >>> a
+        <ArrayLocation weight:10, width:(1.000,2.000) >
+        >>> a.toLocation() == Location(width=(1, 2), weight=10)
+        True
+
+    New axes are added to the end.
+    ::
+
+        >>> r.fromLocation(Location(optical=12)).x.tolist()
+        [nan, nan, 12.0]
+        >>> r.names
+        ['weight', 'width', 'optical']
+    """
+
+    def __init__(self, names=None):
+        self._names = []
+        self._indices = {}
+        if names is not None:
+            for name in names:
+                self.add(name)
+
+    def __repr__(self):
+        return "<%s %s>" % (self.__class__.__name__, " ".join(self._names))
+
+    def __len__(self):
+        return len(self._names)
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __contains__(self, name):
+        return name in self._indices
+
+    @property
+    def names(self):
+        return list(self._names)
+
+    def add(self, name):
+        """ Return the index of the axis, add the axis if it is new. """
+        index = self._indices.get(name)
+        if index is None:
+            index = self._indices[name] = len(self._names)
+            self._names.append(name)
+        return index
+
+    def index(self, name):
+        """ Return the index of the axis, raise KeyError if it is unknown. """
+        return self._indices[name]
+
+    def fromLocation(self, aLocation):
+        """ Return aLocation as an ArrayLocation with this registry. """
+        return ArrayLocation(aLocation, self)
+
+
+def _padArrays(x, y, count):
+    # NaN for the axes that were added to the registry later
+    missing = count - x.shape[-1]
+    if missing <= 0:
+        return x, y
+    pad = numpy.full(x.shape[:-1] + (missing,), numpy.nan)
+    return numpy.concatenate((x, pad), axis=-1), numpy.concatenate((y, pad), axis=-1)
+
+
+def _arrayValues(x, y):
+    # the x and y values with zero for missing axes
+    x = numpy.where(numpy.isnan(x), 0.0, x)
+    y = numpy.where(numpy.isnan(y), x, y)
+    return x, y
+
+
+def _combineArrays(ax, ay, bx, by, sign):
+    # Location.__add__ and Location.__sub__ on arrays of the same width
+    aPresent, bPresent = ~numpy.isnan(ax), ~numpy.isnan(bx)
+    aSplit, bSplit = ~numpy.isnan(ay), ~numpy.isnan(by)
+    ax, ay = _arrayValues(ax, ay)
+    bx, by = _arrayValues(bx, by)
+    x = ax + sign*bx
+    y = ay + sign*by
+    # values in both collapse when x and y are the same again
+    split = numpy.where(aPresent & bPresent, x != y, aSplit | bSplit)
+    return numpy.where(aPresent | bPresent, x, numpy.nan), numpy.where(split, y, numpy.nan)
+
+
+def _scaleArrays(x, y, factor):
+    # Location.__mul__ on arrays, a tuple factor splits all values
+    if isinstance(factor, tuple):
+        values = _arrayValues(x, y)[1]
+        return x*factor[0], numpy.where(numpy.isnan(x), numpy.nan, values*factor[1])
+    return x*factor, y*factor
+
+
+def _activeArray(x, y):
+    # the same test as Location.strip, split values compare as tuples
+    split = ~numpy.isnan(y)
+    x, y = _arrayValues(x, y)
+    more = (x > _EPSILON) | (split & (x == _EPSILON) & (y > _EPSILON))
+    less = (x < -_EPSILON) | (split & (x == -_EPSILON) & (y < -_EPSILON))
+    return more | less
+
+
+def _divide(location, factor):
+    # the same as Location.__truediv__
+    if isinstance(factor, numpy.ndarray):
+        return location * (1.0/factor)
+    if factor == 0:
+        raise ZeroDivisionError
+    if isinstance(factor, tuple):
+        if factor[0] == 0 or factor[1] == 0:
+            raise ZeroDivisionError
+        return location * (1.0/factor[0]) + location * (1.0/factor[1])
+    return location * (1.0/factor)
+
+
+class ArrayLocation(object):
+    """
+    A location as float arrays in the order of an AxisRegistry.
+    x has the values, NaN for the axes that are not in the location.
+    y has the second value of split values, NaN for values that are not split.
+    The values read back as floats.
+    ::
+
+        >>> r = AxisRegistry()
+        >>> a = ArrayLocation(Location(pop=1, snap=(1, 2)), r)
+        >>> b = ArrayLocation(Location(pop=10, crackle=1), r)
+        >>> a + b
+        <ArrayLocation crackle:1, pop:11, snap:(1.000,2.000) >
+        >>> a - b
+        <ArrayLocation crackle:-1, pop:-9, snap:(1.000,2.000) >
+        >>> a * 2
+        <ArrayLocation pop:2, snap:(2.000,4.000) >
+        >>> (a + b).toLocation() == Location(pop=1, snap=(1, 2)) + Location(pop=10, crackle=1)
+        True
+        >>> a['snap'], a.get('crackle'), sorted(a.keys())
+        ((1.0, 2.0), None, ['pop', 'snap'])
+        >>> b.isOnAxis(), ArrayLocation(Location(pop=0, snap=3), r).isOnAxis()
+        (False, 'snap')
+
+    A Location can be made from an ArrayLocation.
+    ::
+
+        >>> Location(a)
+        <Location pop:1, snap:(1.000,2.000) >
+    """
+
+    __slots__ = ['registry', 'x', 'y']
+
+    def __init__(self, aLocation=None, registry=None):
+        if numpy is None:
+            raise MutatorError("ArrayLocation needs numpy.")
+        if registry is None:
+            registry = AxisRegistry()
+        self.registry = registry
+        if aLocation is None:
+            aLocation = {}
+        for name in sorted(aLocation.keys()):
+            registry.add(name)
+        self.x = numpy.full(len(registry), numpy.nan)
+        self.y = numpy.full(len(registry), numpy.nan)
+        for name, value in aLocation.items():
+            index = registry.index(name)
+            if isinstance(value, tuple):
+                self.x[index], self.y[index] = value
+            else:
+                self.x[index] = value
+
+    def _new(self, x, y):
+        new = ArrayLocation.__new__(ArrayLocation)
+        new.registry = self.registry
+        new.x = x
+        new.y = y
+        return new
+
+    def _padded(self, count):
+        return _padArrays(self.x, self.y, count)
+
+    def _coerce(self, other):
+        if not isinstance(other, (ArrayLocation, LocationArray)):
+            other = ArrayLocation(other, self.registry)
+        elif other.registry is not self.registry:
+            raise MutatorError("Can not combine locations with different axis registries.", other)
+        return other
+
+    def __repr__(self):
+        return "<%s %s >" % (self.__class__.__name__, self.toLocation().asString())
+
+    def copy(self):
+        return self._new(self.x.copy(), self.y.copy())
+
+    def toLocation(self):
+        """ Return the location as a Location. """
+        return Location(self.items())
+
+    def asTuple(self):
+        return tuple(sorted(self.items()))
+
+    # read only mapping
+
+    def keys(self):
+        names = self.registry._names
+        return [names[i] for i in numpy.flatnonzero(~numpy.isnan(self.x))]
+
+    def items(self):
+        return [(name, self[name]) for name in self.keys()]
+
+    def __getitem__(self, name):
+        index = self.registry._indices.get(name)
+        if index is None or index >= len(self.x) or numpy.isnan(self.x[index]):
+            raise KeyError(name)
+        if numpy.isnan(self.y[index]):
+            return float(self.x[index])
+        return float(self.x[index]), float(self.y[index])
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return int(numpy.count_nonzero(~numpy.isnan(self.x)))
+
+    # comparisons
+
+    def __eq__(self, other):
+        if not isinstance(other, ArrayLocation):
+            return self.toLocation() == other
+        if other.registry is not self.registry:
+            return self.toLocation() == other.toLocation()
+        count = max(len(self.x), len(other.x))
+        ax, ay = self._padded(count)
+        bx, by = other._padded(count)
+        return bool(numpy.array_equal(numpy.isnan(ax), numpy.isnan(bx))
+            and numpy.array_equal(numpy.isnan(ay), numpy.isnan(by))
+            and numpy.all((ax == bx) | numpy.isnan(ax))
+            and numpy.all((ay == by) | numpy.isnan(ay)))
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def isOrigin(self):
+        x, y = _arrayValues(self.x, self.y)
+        return bool(numpy.all(numpy.abs(x) <= _EPSILON) and numpy.all(numpy.abs(y) <= _EPSILON))
+
+    def isOnAxis(self):
+        """ The same as Location.isOnAxis. """
+        active = numpy.flatnonzero(_activeArray(self.x, self.y))
+        if len(active) > 1:
+            return False
+        elif len(active) == 1:
+            return self.registry._names[active[0]]
+        return None
+
+    def isAmbivalent(self, dim=None):
+        if dim is not None:
+            return isinstance(self.get(dim), tuple)
+        return bool(numpy.any(~numpy.isnan(self.y)))
+
+    def getActiveAxes(self):
+        # split values count as active, like the tuples in Location
+        active = ((self.x != 0) & ~numpy.isnan(self.x)) | ~numpy.isnan(self.y)
+        names = self.registry._names
+        return sorted([names[i] for i in numpy.flatnonzero(active)])
+
+    def expand(self, axisNames):
+        """ Set the axes in axisNames that are not in the location to zero. """
+        for name in axisNames:
+            self.registry.add(name)
+        self.x, self.y = self._padded(len(self.registry))
+        for name in axisNames:
+            index = self.registry.index(name)
+            if numpy.isnan(self.x[index]):
+                self.x[index] = 0
+
+    def strip(self):
+        active = _activeArray(self.x, self.y)
+        return self._new(numpy.where(active, self.x, numpy.nan), numpy.where(active, self.y, numpy.nan))
+
+    def common(self, other):
+        """ The same as Location.common, with the x values of split values. """
+        other = self._coerce(other)
+        count = max(len(self.x), len(other.x))
+        ax, ay = self._padded(count)
+        bx, by = other._padded(count)
+        both = ~numpy.isnan(ax) & ~numpy.isnan(bx)
+        zero = (numpy.abs(ax) < _EPSILON) & (numpy.abs(bx) < _EPSILON)
+        mask = both & ~zero
+        if not numpy.any(mask):
+            return None, None
+        nan = numpy.nan
+        return (self._new(numpy.where(mask, ax, nan), numpy.where(mask, ay, nan)),
+            self._new(numpy.where(mask, bx, nan), numpy.where(mask, by, nan)))
+
+    def distance(self, other=None):
+        """ The distance between the x values. """
+        if other is None:
+            other = self._new(numpy.zeros(0), numpy.zeros(0))
+        other = self._coerce(other)
+        count = max(len(self.x), len(other.x))
+        ax = _arrayValues(*self._padded(count))[0]
+        bx = _arrayValues(*other._padded(count))[0]
+        return float(numpy.sqrt(numpy.sum((bx-ax)**2)))
+
+    def sameAs(self, other):
+        if not hasattr(other, "get"):
+            return -1
+        if self.distance(other) < _EPSILON:
+            return 0
+        return -1
+
+    # math
+
+    def _combine(self, other, sign):
+        other = self._coerce(other)
+        if isinstance(other, LocationArray):
+            return other._combine(self, sign, True)
+        count = max(len(self.x), len(other.x))
+        ax, ay = self._padded(count)
+        bx, by = other._padded(count)
+        return self._new(*_combineArrays(ax, ay, bx, by, sign))
+
+    def __add__(self, other):
+        return self._combine(other, 1)
+
+    def __sub__(self, other):
+        return self._combine(other, -1)
+
+    def __mul__(self, factor):
+        return self._new(*_scaleArrays(self.x, self.y, factor))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, factor):
+        return _divide(self, factor)
+
+    __div__ = __truediv__
+
+
+class LocationArray(object):
+    """
+    Many locations as N x D float arrays, one row per location and one
+    column per axis of an AxisRegistry. x and y follow ArrayLocation:
+    NaN in x for missing axes, NaN in y for values that are not split.
+    Batch methods of the mutator take a LocationArray.
+    ::
+
+        >>> locations = LocationArray([Location(pop=1), Location(pop=2, snap=(1, 3)), Location()])
+        >>> len(locations), locations.registry.names
+        (3, ['pop', 'snap'])
+        >>> locations.isOrigin().tolist(), locations.isOnAxis(), locations.isAmbivalent().tolist()
+        ([False, False, True], ['pop', False, None], [False, True, False])
+        >>> locations[1]
+        <ArrayLocation pop:2, snap:(1.000,3.000) >
+        >>> (locations * 2 - Location(pop=1)).toLocations()
+        [<Location pop:1 >, <Location pop:3, snap:(2.000,6.000) >, <Location pop:-1 >]
+        >>> locations.distance(Location(pop=2)).tolist()
+        [1.0, 1.0, 2.0]
+        >>> x, y = locations.split()
+        >>> y.toLocations()
+        [<Location pop:1 >, <Location pop:2, snap:3 >, <Location origin >]
+    """
+
+    __slots__ = ['registry', 'x', 'y']
+
+    def __init__(self, locations=None, registry=None):
+        if numpy is None:
+            raise MutatorError("LocationArray needs numpy.")
+        if registry is None:
+            registry = AxisRegistry()
+        self.registry = registry
+        if locations is None:
+            locations = []
+        locations = list(locations)
+        names = set()
+        for aLocation in locations:
+            names.update(aLocation.keys())
+        for name in sorted(names):
+            registry.add(name)
+        indices = registry._indices
+        self.x = numpy.full((len(locations), len(registry)), numpy.nan)
+        self.y = numpy.full((len(locations), len(registry)), numpy.nan)
+        for row, aLocation in enumerate(locations):
+            for name, value in aLocation.items():
+                if isinstance(value, tuple):
+                    self.x[row, indices[name]], self.y[row, indices[name]] = value
+                else:
+                    self.x[row, indices[name]] = value
+
+    @classmethod
+    def fromArray(cls, x, registry, y=None):
+        """
+            Make a LocationArray from an N x D array with a column for each
+            axis in the registry, and optionally the y values of split values.
+        """
+        x = numpy.array(x, dtype=float)
+        if x.ndim != 2 or x.shape[1] > len(registry):
+            raise MutatorError("Need an array with a column for each axis.", x.shape)
+        if y is None:
+            y = numpy.full(x.shape, numpy.nan)
+        y = numpy.array(y, dtype=float)
+        if y.shape != x.shape:
+            raise MutatorError("The x and y arrays need the same shape.", y.shape)
+        new = cls.__new__(cls)
+        new.registry = registry
+        new.x = x
+        new.y = y
+        return new
+
+    def _new(self, x, y):
+        new = LocationArray.__new__(LocationArray)
+        new.registry = self.registry
+        new.x = x
+        new.y = y
+        return new
+
+    def _padded(self, count):
+        return _padArrays(self.x, self.y, count)
+
+    def _coerce(self, other):
+        if not isinstance(other, (ArrayLocation, LocationArray)):
+            other = ArrayLocation(other, self.registry)
+        elif other.registry is not self.registry:
+            raise MutatorError("Can not combine locations with different axis registries.", other)
+        return other
+
+    def __repr__(self):
+        return "<%s %d locations, %s>" % (self.__class__.__name__, len(self), " ".join(self.registry.names))
+
+    def __len__(self):
+        return self.x.shape[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice) or not numpy.isscalar(index):
+            return self._new(self.x[index], self.y[index])
+        location = ArrayLocation.__new__(ArrayLocation)
+        location.registry = self.registry
+        location.x = self.x[index].copy()
+        location.y = self.y[index].copy()
+        return location
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def copy(self):
+        return self._new(self.x.copy(), self.y.copy())
+
+    def toLocations(self):
+        """ Return a list of Location objects. """
+        names = self.registry._names
+        locations = []
+        for x, y in zip(self.x.tolist(), self.y.tolist()):
+            location = Location()
+            for index, value in enumerate(x):
+                if value != value:
+                    # NaN, the axis is not in this location
+                    continue
+                if y[index] != y[index]:
+                    location[names[index]] = value
+                else:
+                    location[names[index]] = value, y[index]
+            locations.append(location)
+        return locations
+
+    def getValues(self, axisNames):
+        """
+            Return the x values of the axes in axisNames as an N x len(axisNames)
+            array, zero for axes that are not in a location.
+        """
+        values = numpy.zeros((len(self), len(axisNames)))
+        for column, name in enumerate(axisNames):
+            index = self.registry._indices.get(name)
+            if index is not None and index < self.x.shape[1]:
+                values[:, column] = self.x[:, index]
+        return numpy.where(numpy.isnan(values), 0.0, values)
+
+    # tests, one result per location
+
+    def isOrigin(self):
+        x, y = _arrayValues(self.x, self.y)
+        return numpy.all(numpy.abs(x) <= _EPSILON, axis=-1) & numpy.all(numpy.abs(y) <= _EPSILON, axis=-1)
+
+    def isOnAxis(self):
+        """ A list with Location.isOnAxis for each location. """
+        active = _activeArray(self.x, self.y)
+        if not active.shape[-1]:
+            return [None] * len(self)
+        counts = active.sum(axis=-1)
+        first = numpy.argmax(active, axis=-1)
+        names = self.registry._names
+        result = []
+        for count, index in zip(counts.tolist(), first.tolist()):
+            if count > 1:
+                result.append(False)
+            elif count == 1:
+                result.append(names[index])
+            else:
+                result.append(None)
+        return result
+
+    def isAmbivalent(self):
+        return numpy.any(~numpy.isnan(self.y), axis=-1)
+
+    def split(self):
+        """ Return two LocationArrays, one with the x values, the other with the y values. """
+        x, y = _arrayValues(self.x, self.y)
+        missing = numpy.isnan(self.x)
+        notSplit = numpy.full(self.x.shape, numpy.nan)
+        return self._new(self.x.copy(), notSplit), self._new(numpy.where(missing, numpy.nan, y), notSplit.copy())
+
+    def distance(self, other=None):
+        """ The distance between the x values of each location and other. """
+        if other is None:
+            return numpy.sqrt(numpy.sum(_arrayValues(self.x, self.y)[0]**2, axis=-1))
+        other = self._coerce(other)
+        count = max(self.x.shape[-1], other.x.shape[-1])
+        ax = _arrayValues(*self._padded(count))[0]
+        bx = _arrayValues(*other._padded(count))[0]
+        return numpy.sqrt(numpy.sum((bx-ax)**2, axis=-1))
+
+    # math
+
+    def _combine(self, other, sign, reverse=False):
+        other = self._coerce(other)
+        count = max(self.x.shape[-1], other.x.shape[-1])
+        ax, ay = self._padded(count)
+        bx, by = other._padded(count)
+        ax, ay, bx, by = numpy.broadcast_arrays(ax, ay, bx, by)
+        if reverse:
+            return self._new(*_combineArrays(bx, by, ax, ay, sign))
+        return self._new(*_combineArrays(ax, ay, bx, by, sign))
+
+    def __add__(self, other):
+        return self._combine(other, 1)
+
+    def __sub__(self, other):
+        return self._combine(other, -1)
+
+    def __mul__(self, factor):
+        if isinstance(factor, numpy.ndarray):
+            # a factor for each location
+            factor = factor.reshape((-1, 1))
+        return self._new(*_scaleArrays(self.x, self.y, factor))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, factor):
+        return _divide(self, factor)
+
+    __div__ = __truediv__
+
+
+_TREE_LEAF_SIZE = 8
+
+class LocationTree(object):
+    """
+    A k-d tree of locations, for the nearest locations and the locations
+    in a box without comparing all locations. Build it from a list of
+    locations or a LocationArray. The results are indices in the list, or
+    rows of the array. Distances are the same as Location.distance.
+    ::
+
+        >>> masters = [Location(wt=0), Location(wt=1000), Location(wt=1000, wd=500), Location(wd=500)]
+        >>> tree = LocationTree(masters)
+        >>> tree.getNearest(Location(wt=900, wd=100))
+        [(141.4213562373095, 1)]
+        >>> [index for distance, index in tree.getNearest(Location(wt=900, wd=300), 3)]
+        [2, 1, 3]
+
+    Axes that are in neither minimum nor maximum are not limited.
+    ::
+
+        >>> tree.getInBox(Location(wt=500), Location(wt=1000))
+        [1, 2]
+        >>> tree.getInBox(Location(wd=0), Location(wd=400))
+        [0, 1]
+    """
+
+    def __init__(self, locations):
+        if isinstance(locations, LocationArray):
+            if locations.isAmbivalent().any():
+                raise MutatorError("LocationTree can not use split locations.", locations)
+            self.axisNames = locations.registry.names[:locations.x.shape[1]]
+            self.points = [tuple(row) for row in locations.getValues(self.axisNames).tolist()]
+        else:
+            names = set()
+            for aLocation in locations:
+                names.update(aLocation.keys())
+            self.axisNames = sorted(names)
+            self.points = [self._getPoint(aLocation) for aLocation in locations]
+        self._root = self._build(list(range(len(self.points))))
+
+    def __len__(self):
+        return len(self.points)
+
+    def _getPoint(self, aLocation):
+        point = []
+        for name in self.axisNames:
+            value = aLocation.get(name, 0)
+            if isinstance(value, tuple):
+                raise MutatorError("LocationTree can not use split locations.", aLocation)
+            point.append(value)
+        return tuple(point)
+
+    def _build(self, indices):
+        # a node is (axis, split, lower, upper), a leaf is a list of indices
+        if len(indices) <= _TREE_LEAF_SIZE or not self.axisNames:
+            return indices
+        points = self.points
+        spread = []
+        for axis in range(len(self.axisNames)):
+            values = [points[i][axis] for i in indices]
+            spread.append(max(values) - min(values))
+        axis = spread.index(max(spread))
+        if not spread[axis]:
+            return indices
+        indices.sort(key=lambda i: (points[i][axis], i))
+        middle = len(indices) // 2
+        split = points[indices[middle]][axis]
+        return axis, split, self._build(indices[:middle]), self._build(indices[middle:])
+
+    def getNearest(self, aLocation, count=1):
+        """
+            Return (distance, index) of the count locations nearest to
+            aLocation, nearest first. Equal distances are sorted by index.
+        """
+        query = self._getPoint(aLocation)
+        # the axes that are not in the tree add the same to all distances
+        extra = 0
+        for name, value in aLocation.items():
+            if name not in self.axisNames:
+                if isinstance(value, tuple):
+                    raise MutatorError("LocationTree can not use split locations.", aLocation)
+                extra += value**2
+        # a heap of the nearest so far, the furthest on top
+        nearest = []
+        if count > 0:
+            self._searchNearest(self._root, query, count, nearest)
+        return [(math.sqrt(-d + extra), -i) for d, i in sorted(nearest, reverse=True)]
+
+    def _searchNearest(self, node, query, count, nearest):
+        if isinstance(node, list):
+            for index in node:
+                point = self.points[index]
+                d = 0
+                for a, b in zip(point, query):
+                    d += (a-b)**2
+                item = (-d, -index)
+                if len(nearest) < count:
+                    heapq.heappush(nearest, item)
+                elif item > nearest[0]:
+                    heapq.heapreplace(nearest, item)
+            return
+        axis, split, lower, upper = node
+        difference = query[axis] - split
+        if difference < 0:
+            near, far = lower, upper
+        else:
+            near, far = upper, lower
+        self._searchNearest(near, query, count, nearest)
+        if len(nearest) < count or difference**2 <= -nearest[0][0]:
+            self._searchNearest(far, query, count, nearest)
+
+    def getInBox(self, minimum, maximum):
+        """
+            Return the sorted indices of the locations with all values
+            between the values of minimum and maximum, inclusive.
+        """
+        lo = []
+        hi = []
+        for name in self.axisNames:
+            lo.append(minimum.get(name, -float("inf")))
+            hi.append(maximum.get(name, float("inf")))
+        # the locations are zero on the axes that are not in the tree
+        for name in set(minimum.keys()) | set(maximum.keys()):
+            if name not in self.axisNames:
+                if not minimum.get(name, -float("inf")) <= 0 <= maximum.get(name, float("inf")):
+                    return []
+        found = []
+        self._searchBox(self._root, lo, hi, found)
+        return sorted(found)
+
+    def _searchBox(self, node, lo, hi, found):
+        if isinstance(node, list):
+            for index in node:
+                point = self.points[index]
+                for v, a, b in zip(point, lo, hi):
+                    if not a <= v <= b:
+                        break
+                else:
+                    found.append(index)
+            return
+        axis, split, lower, upper = node
+        if lo[axis] <= split:
+            self._searchBox(lower, lo, hi, found)
+        if hi[axis] >= split:
+            self._searchBox(upper, lo, hi, found)
+
+
+_BYTES_MAGIC = b"MMLO"
+_BYTES_VERSION = 1
+_BYTES_HEADER = "<4sIII"
+_BYTES_AXIS = "<BH"
+
+def locationsToBytes(locations):
+    """
+        Pack a list of locations, or a LocationArray, in bytes.
+        A header with the number of axes and locations, a table with the
+        axis names, and a column of float64 values for each axis. Missing
+        axes are NaN. An axis with split values has a second column with
+        the y values, NaN for the values that are not split.
+        Values read back as floats.
+        ::
+
+            >>> data = locationsToBytes([Location(pop=1), Location(pop=2, snap=(1, 3))])
+            >>> locationsFromBytes(data)
+            [<Location pop:1 >, <Location pop:2, snap:(1.000,3.000) >]
+    """
+    nan = float("nan")
+    if isinstance(locations, LocationArray):
+        names = locations.registry.names[:locations.x.shape[1]]
+        count = len(locations)
+        xColumns = [locations.x[:, index].tolist() for index in range(len(names))]
+        yColumns = [locations.y[:, index].tolist() for index in range(len(names))]
+        yColumns = [(None if all(v != v for v in column) else column) for column in yColumns]
+    else:
+        names = set()
+        for aLocation in locations:
+            names.update(aLocation.keys())
+        names = sorted(names)
+        count = len(locations)
+        xColumns = []
+        yColumns = []
+        for name in names:
+            x = []
+            y = None
+            for row, aLocation in enumerate(locations):
+                value = aLocation.get(name, nan)
+                if isinstance(value, tuple):
+                    if y is None:
+                        y = [nan] * count
+                    y[row] = value[1]
+                    value = value[0]
+                x.append(value)
+            xColumns.append(x)
+            yColumns.append(y)
+    data = [struct.pack(_BYTES_HEADER, _BYTES_MAGIC, _BYTES_VERSION, len(names), count)]
+    for name, y in zip(names, yColumns):
+        name = name.encode("utf-8")
+        data.append(struct.pack(_BYTES_AXIS, y is not None, len(name)))
+        data.append(name)
+    columnFormat = "<%dd" % count
+    for x, y in zip(xColumns, yColumns):
+        data.append(struct.pack(columnFormat, *x))
+        if y is not None:
+            data.append(struct.pack(columnFormat, *y))
+    return b"".join(data)
+
+
+def locationsFromBytes(data):
+    """
+        Return a list of Location objects from bytes made by locationsToBytes.
+    """
+    headerSize = struct.calcsize(_BYTES_HEADER)
+    if len(data) < headerSize:
+        raise MutatorError("Not location data.", None)
+    magic, version, axisCount, count = struct.unpack_from(_BYTES_HEADER, data, 0)
+    if magic != _BYTES_MAGIC:
+        raise MutatorError("Not location data.", None)
+    if version != _BYTES_VERSION:
+        raise MutatorError("Can not read location data of version %s." % version, None)
+    offset = headerSize
+    axes = []
+    axisSize = struct.calcsize(_BYTES_AXIS)
+    for index in range(axisCount):
+        split, size = struct.unpack_from(_BYTES_AXIS, data, offset)
+        offset += axisSize
+        axes.append((data[offset:offset+size].decode("utf-8"), split))
+        offset += size
+    columnFormat = "<%dd" % count
+    columnSize = struct.calcsize(columnFormat)
+    locations = [Location() for row in range(count)]
+    for name, split in axes:
+        x = struct.unpack_from(columnFormat, data, offset)
+        offset += columnSize
+        if split:
+            y = struct.unpack_from(columnFormat, data, offset)
+            offset += columnSize
+        for row, value in enumerate(x):
+            if value != value:
+                # NaN, the axis is not in this location
+                continue
+            if split and y[row] == y[row]:
+                locations[row][name] = value, y[row]
+            else:
+                locations[row][name] = value
+    return locations
+
+
 def sortLocations(locations):
     """ Sort the locations by ranking:
             1.  all on-axis points
@@ -644,10 +1608,36 @@ def sortLocations(locations):
     return onAxis, offAxis_projecting, offAxis_wild
 
 
+_biasCache = {}
+_BIAS_CACHE_SIZE = 256
+
 def biasFromLocations(locs, preferOrigin=True):
     """
         Find the vector that translates the whole system to the origin. 
+        The bias is kept for the next call with the same set of locations.
     """
+    counts = {}
+    try:
+        for l in locs:
+            l = FrozenLocation(l)
+            counts[l] = counts.get(l, 0) + 1
+    except TypeError:
+        # values that can not be hashed
+        return _biasFromLocations(locs, preferOrigin)
+    key = frozenset(counts.items()), preferOrigin
+    bias = _biasCache.get(key)
+    if bias is not None:
+        for l in locs:
+            if l == bias:
+                return l
+    bias = _biasFromLocations(locs, preferOrigin)
+    if len(_biasCache) >= _BIAS_CACHE_SIZE:
+        _biasCache.clear()
+    _biasCache[key] = FrozenLocation(bias)
+    return bias
+
+
+def _biasFromLocations(locs, preferOrigin):
     dims = {}
     locs.sort()
     for l in locs:
@@ -690,12 +1680,16 @@ def biasFromLocations(locs, preferOrigin=True):
                     return c
         return matches[0]
     # 3. no matches. Find the best from the available locations
+    offAxisCounts = _offAxisCounts(locs)
+    if offAxisCounts is None:
+        offAxisCounts = []
+        for bias in locs:
+            rel = []
+            for l in locs:
+                rel.append((l - bias).isOnAxis())
+            offAxisCounts.append(rel.count(False))
     results = {}
-    for bias in locs:
-        rel = []
-        for l in locs:
-            rel.append((l - bias).isOnAxis())
-        c = rel.count(False)
+    for bias, c in zip(locs, offAxisCounts):
         if not c in results:
             results[c] = []
         results[c].append(bias)
@@ -710,6 +1704,54 @@ def biasFromLocations(locs, preferOrigin=True):
     return Location()
 
 
+def _offAxisCounts(locs):
+    """
+        For each location as bias, count the locations that are off-axis
+        relative to it: the number of (l - bias).isOnAxis() that are False.
+        A location is on-axis relative to the bias when the coordinates are
+        the same on all axes but one. These are counted with a table of the
+        coordinates for each axis that is left out, instead of comparing
+        all pairs. Return None for split values, and for coordinates that
+        are different but not more than _EPSILON apart.
+    """
+    names = set()
+    for l in locs:
+        names.update(l.keys())
+    names = sorted(names)
+    rows = []
+    for l in locs:
+        row = []
+        for name in names:
+            value = l.get(name, 0)
+            if isinstance(value, tuple):
+                return None
+            row.append(value)
+        rows.append(tuple(row))
+    for column in zip(*rows):
+        values = sorted(set(column))
+        for a, b in zip(values, values[1:]):
+            if b - a <= _EPSILON:
+                return None
+    same = {}
+    for row in rows:
+        same[row] = same.get(row, 0) + 1
+    # the locations that are the same on all axes but one
+    sameButOne = []
+    for index in range(len(names)):
+        counts = {}
+        for row in rows:
+            key = row[:index] + row[index+1:]
+            counts[key] = counts.get(key, 0) + 1
+        sameButOne.append(counts)
+    offAxisCounts = []
+    for row in rows:
+        onAxis = same[row]
+        for index, counts in enumerate(sameButOne):
+            onAxis += counts[row[:index] + row[index+1:]] - same[row]
+        offAxisCounts.append(len(rows) - onAxis)
+    return offAxisCounts
+
+
 def mostCommon(L):
     """
         #   http://stackoverflow.com/questions/1518522/python-most-common-element-in-a-list
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division
+
+from mutatorMath.objects.error import MutatorError
+
+import numpy
+
+
+__all__ = ["MathArray"]
+
+
+class MathArray(object):
+
+    """
+        A math object for numeric data in a numpy array of floats:
+        point clouds, metrics tables, kerning values.
+        Mutator can interpolate it like any other math object.
+        ::
+
+            >>> from mutatorMath.objects.location import Location
+            >>> from mutatorMath.objects.mutator import buildMutator
+            >>> items = [
+            ...     (Location(weight=0), MathArray([[0, 0], [100, 0]])),
+            ...     (Location(weight=1), MathArray([[0, 10], [200, 20]])),
+            ... ]
+            >>> bias, m = buildMutator(items)
+            >>> m.makeInstance(Location(weight=0.5))
+            <MathArray (2, 2) [[0.0, 5.0], [150.0, 10.0]]>
+
+        A tuple factor scales the columns of the last dimension, so the x and
+        y of the points can have a different location.
+        ::
+
+            >>> m.makeInstance(Location(weight=(0.5, 1))).shape
+            (2, 2)
+            >>> m.makeInstance(Location(weight=(0.5, 1))).values.tolist()
+            [[0.0, 10.0], [150.0, 20.0]]
+    """
+
+    __slots__ = ['values', '_scratch']
+
+    def __init__(self, values, shape=None):
+        values = numpy.array(values, dtype=float)
+        if shape is not None:
+            values = values.reshape(shape)
+        self.values = values
+        self._scratch = None
+
+    def __repr__(self):
+        return "<%s %s %s>" % (self.__class__.__name__, self.shape, self.values.tolist())
+
+    def __getstate__(self):
+        # a bare array is tested for truth by the older pickle protocols
+        return {'values': self.values}
+
+    def __setstate__(self, state):
+        self.values = state['values']
+        self._scratch = None
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def __len__(self):
+        return len(self.values)
+
+    def copy(self):
+        return self.__class__(self.values)
+
+    def _checkShape(self, other):
+        if self.values.shape != other.values.shape:
+            raise MutatorError("Can not combine arrays of shape %s and %s." % (self.values.shape, other.values.shape), other)
+
+    def _factor(self, factor):
+        # a tuple scales the columns of the last dimension
+        if isinstance(factor, tuple):
+            if not self.values.ndim or self.values.shape[-1] != len(factor):
+                raise MutatorError("Can not scale an array of shape %s with %s." % (self.values.shape, str(factor)), factor)
+            return numpy.array(factor, dtype=float)
+        return factor
+
+    def __add__(self, other):
+        self._checkShape(other)
+        return self._new(self.values + other.values)
+
+    def __sub__(self, other):
+        self._checkShape(other)
+        return self._new(self.values - other.values)
+
+    def __mul__(self, factor):
+        return self._new(self.values * self._factor(factor))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, factor):
+        return self._new(self.values / self._factor(factor))
+
+    __div__ = __truediv__
+
+    def _new(self, values):
+        new = self.__class__.__new__(self.__class__)
+        new.values = values
+        new._scratch = None
+        return new
+
+    def _iaddScaled(self, other, factor):
+        """
+            Add factor * other to this array in place, without new arrays
+            after the first call.
+        """
+        self._checkShape(other)
+        if not isinstance(factor, tuple) and factor == 1:
+            self.values += other.values
+            return
+        if self._scratch is None:
+            self._scratch = numpy.empty_like(self.values)
+        numpy.multiply(other.values, self._factor(factor), out=self._scratch)
+        self.values += self._scratch
+
+
+if __name__ == "__main__":
+    import sys
+    import doctest
+    sys.exit(doctest.testmod().failed)
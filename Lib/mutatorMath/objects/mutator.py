@@ -1,39 +1,87 @@
 # -*- coding: utf-8 -*-
 
 from mutatorMath.objects.error import MutatorError
-from mutatorMath.objects.location import Location, sortLocations, biasFromLocations
+from mutatorMath.objects.location import Location, FrozenLocation, LocationArray, sortLocations, biasFromLocations
 
 import sys, warnings
+import io
+import mmap
+import pickle
+import struct
+import threading
+import weakref
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
 from operator import itemgetter
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
-__all__ = ['Mutator', 'buildMutator']
+
+__all__ = ['Mutator', 'buildMutator', 'saveMutators', 'loadMutators']
 
 _EPSILON = sys.float_info.epsilon
 
+# the number of recent locations makeInstances keeps the factors of
+_MAKE_INSTANCES_CACHE_SIZE = 64
+
 
 def noBend(loc): return loc
 
 
-def buildMutator(items, axes=None, bias=None):
+def buildMutator(items, axes=None, bias=None, masterWeights=False, bender=None, grid=False):
     """
         Build a mutator with the (location, obj) pairs in items.
         Determine the bias based on the given locations.
+        bender: a Bender for the axes, to share one Bender between the
+            mutators of a designspace. When it is given, axes is not used.
+        masterWeights:
+            *   True: do not calculate the punched deltas of the objects.
+                The mutator calculates the weight of each master and adds
+                the weighted differences of the masters with the neutral
+                to the neutral. The weights are shared by all mutators with
+                the same master locations. As with grid, math objects that
+                keep attributes of the first item can get them from another
+                master.
+            *   False: calculate the deltas.
+        grid:
+            *   True: if the masters are on a full grid, interpolate the
+                deltas of the masters on the corners of the cell around
+                each instance. The values are the same as with the deltas,
+                but math objects that keep attributes of the first item,
+                like the note of a glyph, can get them from another master.
+            *   False: always interpolate with the deltas.
     """
     from mutatorMath.objects.bender import Bender
     items = [(Location(loc),obj) for loc, obj in items]
+    masterLocations = _internKey(tuple([loc.asTuple() for loc, obj in items]))
+    masterObjects = [obj for loc, obj in items]
     if bias is None:
         bias = Location()
     else:
         bias = Location(bias)
     m = Mutator()
-    if axes is not None:
+    if bender is not None:
+        # do not transform the locations from the items
+        m.setBender(bender)
+    elif axes is not None:
         # make a Bender object
         # but do not transform the locations from the items
         bender = Bender(axes)
         m.setBender(bender)
     else:
         bender = noBend
+    if masterWeights:
+        weights = _getMasterWeightsMutator(masterLocations.key, bias)
+        m.setBias(weights.getBias())
+        m._masterLocations = masterLocations
+        m._masterObjects = masterObjects
+        m._weights = weights
+        m._masters = masterObjects
+        m._neutral = m._masters[list(weights.getNeutral()).index(1)]
+        return m.getBias(), m
     # the order itself does not matter, but we should always build in the same order.
     items = sorted(items)
     if not bias:
@@ -58,12 +106,179 @@ def buildMutator(items, axes=None, bias=None):
             ofx.append((lb, obj-m.getNeutral()))
     for loc, obj in onx:
         m.addDelta(loc, obj, punch=False,  axisOnly=True)
-    for loc, obj in ofx:
-        m.addDelta(loc, obj, punch=True,  axisOnly=True)
+    m._punchedKeys = _internKey(tuple(sorted(_punchOffAxisDeltas(m, ofx).items())))
+    if grid:
+        # masters on a full grid can be interpolated cell by cell
+        m._grid = _GridEvaluator.fromItems([(loc-bias, obj) for loc, obj in items])
+    m._masterLocations = masterLocations
+    m._masterObjects = masterObjects
     return bias, m
 
 
-class Mutator(dict):
+_internedKeys = weakref.WeakValueDictionary()
+
+class _InternedKey(object):
+
+    """
+        Holds an interned key. The key is interned as long as a mutator
+        keeps its holder.
+    """
+
+    __slots__ = ['key', '__weakref__']
+
+    def __init__(self, key):
+        self.key = key
+
+
+def _internKey(key):
+    """
+        Return the holder of the first equal key that was interned, so all
+        mutators of a family share their location tuples. Keys only match
+        with the same types of values, 1 and 1.0 are kept apart.
+    """
+    typedKey = key, _keyTypes(key)
+    holder = _internedKeys.get(typedKey)
+    if holder is None:
+        holder = _internedKeys[typedKey] = _InternedKey(key)
+    return holder
+
+
+def _keyTypes(key):
+    if isinstance(key, tuple):
+        return tuple([_keyTypes(k) for k in key])
+    return type(key)
+
+
+_masterWeightsMutators = {}
+_MASTER_WEIGHTS_CACHE_SIZE = 256
+
+def _getMasterWeightsMutator(locations, bias):
+    """
+        Return a frozen mutator for these master locations that calculates
+        the weights of the masters instead of an object.
+        locations: a tuple of location tuples.
+        Mutators are kept for the next call with the same locations.
+    """
+    key = locations, bias.asTuple()
+    weights = _masterWeightsMutators.get(key)
+    if weights is None:
+        count = len(locations)
+        items = []
+        for i, loc in enumerate(locations):
+            unit = [0] * count
+            unit[i] = 1
+            items.append((Location(loc), _MasterWeights(unit)))
+        bias, weights = buildMutator(items, bias=bias)
+        weights.freeze()
+        if len(_masterWeightsMutators) >= _MASTER_WEIGHTS_CACHE_SIZE:
+            _masterWeightsMutators.clear()
+        _masterWeightsMutators[key] = weights
+    return weights
+
+
+def _addScaled(total, item, factor=None):
+    """
+        Return total + factor * item, or total + item without a factor.
+        total is changed in place if it has an _iaddScaled(other, factor)
+        method, otherwise the math operators are used.
+        total must be an object that is not used anywhere else.
+    """
+    iaddScaled = getattr(total, "_iaddScaled", None)
+    if iaddScaled is not None:
+        if factor is None:
+            factor = 1
+        iaddScaled(item, factor)
+        return total
+    if factor is None:
+        return total + item
+    total += factor * item
+    return total
+
+
+class _MasterWeights(object):
+
+    """
+        A weight for each master, as a math object.
+        A mutator with these as masters calculates the master weights.
+    """
+
+    __slots__ = ['weights']
+
+    def __init__(self, weights):
+        self.weights = weights
+
+    def __repr__(self):
+        return "<%s %s>" % (self.__class__.__name__, self.weights)
+
+    def __iter__(self):
+        return iter(self.weights)
+
+    def __lt__(self, other):
+        return self.weights < other.weights
+
+    def __add__(self, other):
+        return self.__class__([a+b for a, b in zip(self.weights, other.weights)])
+
+    def __sub__(self, other):
+        return self.__class__([a-b for a, b in zip(self.weights, other.weights)])
+
+    def __mul__(self, factor):
+        return self.__class__([w*factor for w in self.weights])
+
+    __rmul__ = __mul__
+
+    def _iaddScaled(self, other, factor):
+        weights = self.weights
+        for i, w in enumerate(other.weights):
+            weights[i] += w*factor
+
+
+def _punchOffAxisDeltas(m, items):
+    """
+        Add the off-axis (location, delta) pairs in items to the mutator,
+        punched with the on-axis instance at their location.
+        Same result as addDelta(loc, obj, punch=True, axisOnly=True) for each,
+        but in one pass: an axis-only instance does not depend on the other
+        off-axis deltas, so the mutator is compiled once and the on-axis
+        factors are calculated once for every axis value.
+        Return a dictionary with the key of each punched delta, by the
+        location tuple of its item.
+    """
+    keys = {}
+    if not items:
+        return keys
+    plan = _EvaluationPlan(m)
+    axisNames = set(plan.axisNames)
+    axisFactors = {}
+    for loc, obj in items:
+        # a punched delta is stored with zeros for all the axes known so far
+        key = Location(loc)
+        key.expand(axisNames)
+        axisNames.update(key.keys())
+        factors = _axisOnlyFactors(plan, key, axisFactors)
+        m.addDelta(key, obj-m._sumFactors(factors), punch=False, axisOnly=True)
+        keys[loc.asTuple()] = key.asTuple()
+    return keys
+
+
+def _axisOnlyFactors(plan, aLocation, axisFactors):
+    """
+        Return the on-axis factors at aLocation, in the order of getFactors.
+        axisFactors: a dictionary that keeps the factors per axis value.
+    """
+    terms = list(plan.originDeltas)
+    for axisName in plan.axisDeltas.keys():
+        key = axisName, aLocation.get(axisName, 0)
+        if key not in axisFactors:
+            axisFactors[key] = plan.getAxisFactors(axisName, key[1])
+        terms.extend(axisFactors[key])
+    # keep the order of getFactors
+    terms.sort(key=itemgetter(0))
+    factors = [(factor, mathItem, deltaName) for index, factor, mathItem, deltaName in terms]
+    return sorted(factors, key=itemgetter(0), reverse=True)
+
+
+class Mutator(object):
 
     """
         Calculator for multi dimensional interpolations.
@@ -79,14 +294,99 @@ class Mutator(dict):
         # The mutator calculates instances at other locations. Remember to inflate.
         m.getInstance(Location(pop=0.5)) + myNeutralMathObject
 
+    The deltas can be read like a dictionary of location tuples and
+    (mathObject, deltaName) tuples, they are added with addDelta.
     """
 
+    __slots__ = [
+        '_keys', '_keyIndex', '_deltas', '_deltaNames', '_axes', '_bender', '_neutral', '_bias',
+        '_plan', '_index', '_grid', '_frozen', '_factorCache',
+        '_masterLocations', '_masterObjects', '_punchedKeys', '_weights', '_masters', '_masterDeltas',
+        '__weakref__',
+        ]
+
     def __init__(self, neutral=None):
-        self._axes = {}
-        self._tags = {}
+        # the deltas: the holders of the interned location tuples,
+        # the math objects and the names
+        self._keys = []
+        self._keyIndex = {}
+        self._deltas = []
+        self._deltaNames = []
+        self._axes = None
         self._bender = noBend
         self._neutral = neutral
         self._bias = Location()
+        self._plan = None
+        self._index = None
+        self._grid = None
+        self._frozen = False
+        self._factorCache = None
+        # set by buildMutator, the locations and keys as interned holders
+        self._masterLocations = None
+        self._masterObjects = None
+        self._punchedKeys = None
+        self._weights = None
+        self._masters = None
+        self._masterDeltas = None
+
+    #
+    # the deltas, read like a dictionary
+    #
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __contains__(self, key):
+        return key in self._keyIndex
+
+    def __getitem__(self, key):
+        i = self._keyIndex[key]
+        return self._deltas[i], self._deltaNames[i]
+
+    def get(self, key, default=None):
+        if key not in self._keyIndex:
+            return default
+        return self[key]
+
+    def keys(self):
+        return [holder.key for holder in self._keys]
+
+    def values(self):
+        return list(zip(self._deltas, self._deltaNames))
+
+    def items(self):
+        return list(zip(self.keys(), zip(self._deltas, self._deltaNames)))
+
+    def __eq__(self, other):
+        if isinstance(other, (Mutator, dict)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def _setDelta(self, key, mathObject, deltaName):
+        i = self._keyIndex.get(key)
+        if i is not None:
+            self._deltas[i] = mathObject
+            self._deltaNames[i] = deltaName
+            return
+        holder = _internKey(key)
+        self._keyIndex[holder.key] = len(self._keys)
+        self._keys.append(holder)
+        self._deltas.append(mathObject)
+        self._deltaNames.append(deltaName)
 
     def setBender(self, bender):
         self._bender = bender
@@ -115,14 +415,185 @@ class Mutator(dict):
                 *   True: add the difference with the instance value at that location and the delta
                 *   False: just add the delta.
         """
+        if self._frozen:
+            raise MutatorError("Can not add a delta to a frozen mutator.", location)
         if punch:
             r = self.getInstance(location, axisOnly=axisOnly)
             if r is not None:
-                self[location.asTuple()] = aMathObject-r, deltaName
+                # the key has the axes of the mutator, as it always had
+                key = Location(location)
+                key.expand(self.getAxisNames())
+                self._setDelta(key.asTuple(), aMathObject-r, deltaName)
             else:
                 raise MutatorError("Could not get instance.")
         else:
-            self[location.asTuple()] = aMathObject, deltaName
+            self._setDelta(location.asTuple(), aMathObject, deltaName)
+        # the compiled plan, the index, the grid and the cached factors
+        # no longer match the deltas
+        self._plan = None
+        self._index = None
+        self._grid = None
+        if self._factorCache is not None:
+            self._factorCache.clear()
+
+    def updateMaster(self, location, newObject):
+        """
+            Replace the master at location with newObject and calculate
+            only the deltas that depend on it: the delta of the master and,
+            for an on-axis master, the off-axis deltas that were punched with
+            its delta. A new neutral changes all deltas.
+            The result is the same as building the mutator again.
+            location: the location of the master as it was given to buildMutator.
+        """
+        if self._masterLocations is None:
+            raise MutatorError("Updating a master needs the masters from buildMutator.")
+        if self._frozen:
+            raise MutatorError("Can not update a master of a frozen mutator.", location)
+        location = Location(location)
+        masterLocations = self._getMasterLocations()
+        if location not in masterLocations:
+            raise MutatorError("There is no master at this location.", location)
+        self._masterObjects[masterLocations.index(location)] = newObject
+        if self._masters is not None:
+            # the masters are added up with their weights, there are no deltas
+            self._neutral = self._masters[list(self._weights.getNeutral()).index(1)]
+            self._masterDeltas = None
+            return
+        wasCompiled = self._plan is not None
+        wasGrid = self._grid is not None
+        items = [(loc-self._bias, obj) for loc, obj in zip(masterLocations, self._masterObjects)]
+        relative = location-self._bias
+        if relative.isOrigin():
+            self.setNeutral(newObject)
+            changed = None
+            for loc, obj in items:
+                if not loc.isOrigin() and loc.isOnAxis():
+                    self.addDelta(loc, obj-self._neutral, punch=False, axisOnly=True)
+        elif relative.isOnAxis():
+            self.addDelta(relative, newObject-self._neutral, punch=False, axisOnly=True)
+            changed = self[relative.asTuple()][0]
+        else:
+            changed = False
+        plan = _EvaluationPlan(self)
+        axisFactors = {}
+        for loc, obj in items:
+            if loc.isOrigin() or loc.isOnAxis():
+                continue
+            if changed is False and loc != relative:
+                continue
+            key = Location(dict(self._punchedKeys.key)[loc.asTuple()])
+            factors = _axisOnlyFactors(plan, key, axisFactors)
+            if changed is not None and changed is not False:
+                # only the off-axis deltas that were punched with the changed delta
+                if not [item for factor, item, deltaName in factors if item is changed]:
+                    continue
+            self.addDelta(key, obj-self._neutral-self._sumFactors(factors), punch=False, axisOnly=True)
+        if wasGrid:
+            self._grid = _GridEvaluator.fromItems(items)
+        if wasCompiled:
+            self.compile()
+
+    #
+    # serialize
+    #
+
+    def __reduce__(self):
+        """
+            Pickle the mutator as a versioned state: the bias, the neutral,
+            the deltas and what buildMutator knows about the masters.
+            The plan, the index and the grid are made again when it is loaded.
+        """
+        if self._masterLocations is None:
+            masterLocations = None
+        else:
+            masterLocations = list(self._masterLocations.key)
+        if self._punchedKeys is None:
+            punchedKeys = None
+        else:
+            punchedKeys = dict(self._punchedKeys.key)
+        state = dict(
+            version = _SERIAL_VERSION,
+            bias = self._bias.asTuple(),
+            neutral = self._neutral,
+            deltas = [(key, mathItem, deltaName) for key, (mathItem, deltaName) in sorted(self.items())],
+            bender = self._bender,
+            masterLocations = masterLocations,
+            masterObjects = self._masterObjects,
+            punchedKeys = punchedKeys,
+            masterWeights = self._masters is not None,
+            grid = self._grid is not None,
+            compiled = self._plan is not None,
+            frozen = self._frozen,
+            )
+        return _mutatorFromState, (self.__class__, state)
+
+    #
+    # compile
+    #
+
+    def compile(self):
+        """
+            Precompute everything that does not depend on the location
+            we want to evaluate: the axis names, the on-axis breakpoints,
+            the expanded delta locations and the order of the deltas.
+            Instances are then calculated from the compiled plan.
+            Adding a delta discards the plan, call compile() again after.
+        """
+        self._plan = _EvaluationPlan(self)
+        return self
+
+    def freeze(self):
+        """
+            Compile the mutator and refuse new deltas from now on.
+        """
+        self.compile()
+        self._frozen = True
+        return self
+
+    def setFactorCache(self, maxSize=256, quantum=1e-6):
+        """
+            Keep the factors of the most recent locations, so asking for
+            the same location again skips the calculation.
+            maxSize: the number of locations to keep, None to switch the cache off.
+            quantum: locations with values that round to the same multiple
+            of quantum share the factors. The default is far below the
+            precision of design units, also for normalized locations.
+        """
+        if maxSize is None:
+            self._factorCache = None
+        else:
+            self._factorCache = _FactorCache(maxSize, quantum)
+
+    def getFactorCacheInfo(self):
+        """
+            Return a dictionary with the hits, misses, size and maxSize
+            of the factor cache, or None if there is no cache.
+        """
+        if self._factorCache is None:
+            return None
+        return self._factorCache.info()
+
+    def _getIndex(self):
+        """
+            Return the per-axis index of the delta coordinates.
+            It is built once and kept until a delta is added.
+        """
+        if self._index is None:
+            self._index = _AxisIndex(self.keys())
+        return self._index
+
+    def isCompiled(self):
+        return self._plan is not None
+
+    def isFrozen(self):
+        return self._frozen
+
+    def isGrid(self):
+        """
+            Return True if the instances are interpolated on a grid of masters.
+            buildMutator does this when the masters are on a full grid.
+        """
+        return self._grid is not None
 
     #
     # info
@@ -141,9 +612,10 @@ class Mutator(dict):
         """
             Return a dictionary with all on-axis locations.
         """
+        if self._axes is None:
+            self._axes = {}
         for l, (value, deltaName) in self.items():
-            location = Location(l)
-            name = location.isOnAxis()
+            name = FrozenLocation(l).isOnAxis()
             if name is not None and name is not False:
                 if name not in self._axes:
                     self._axes[name] = []
@@ -157,8 +629,7 @@ class Mutator(dict):
         """
         offAxis = {}
         for l, (value, deltaName) in self.items():
-            location = Location(l)
-            name = location.isOnAxis()
+            name = FrozenLocation(l).isOnAxis()
             if name is None or name is False:
                 offAxis[l] = 1
         return list(offAxis.keys())
@@ -173,6 +644,12 @@ class Mutator(dict):
             pts.append(Location(l))
         return pts
 
+    def _getMasterLocations(self):
+        """
+            Return the locations of the masters given to buildMutator.
+        """
+        return [Location(loc) for loc in self._masterLocations.key]
+
     def _allLocations(self):
         """
             Return a list of all locations of all objects.
@@ -196,18 +673,24 @@ class Mutator(dict):
             *   getFactors:
                 *   True: return a list of the calculated factors.
         """
-        self._collectAxisPoints()
         factors = self.getFactors(aLocation, axisOnly)
+        total = self._sumFactors(factors)
+        if getFactors:
+            return total, factors
+        return total
+
+    def _sumFactors(self, factors):
+        """
+            Add up the math items of the (factor, mathItem, deltaName) list.
+        """
         total = None
         for f, item, name in factors:
             if total is None:
                 total = f * item
                 continue
-            total += f * item
+            total = _addScaled(total, item, f)
         if total is None:
             total = 0 * self._neutral
-        if getFactors:
-            return total, factors
         return total
 
     def makeLocation(self, aLocation):
@@ -223,22 +706,189 @@ class Mutator(dict):
         aLocation = self.makeLocation(aLocation)
         if bend:
             aLocation = self._bender(aLocation)
+        return self._makeInstance(aLocation, self._plan)
+
+    def makeInstances(self, locations, bend=False):
+        """
+            Generate the instances for a sequence of locations, in the same order.
+            The mutator is prepared once for all locations. The factors of
+            the most recent locations are kept, so a location that repeats
+            within a short while is not calculated again. Each location gets
+            its own instance object.
+            locations: a sequence of locations or a LocationArray,
+            expected to be in input space
+        """
+        if isinstance(locations, LocationArray):
+            locations = locations.toLocations()
+        plan = self._plan
+        if plan is None and self._masters is None and self._grid is None:
+            plan = _EvaluationPlan(self)
+        done = OrderedDict()
+        for aLocation in locations:
+            aLocation = self.makeLocation(aLocation)
+            key = aLocation.asTuple()
+            terms = done.pop(key, None)
+            if terms is None:
+                if bend:
+                    aLocation = self._bender(aLocation)
+                terms = self._getInstanceTerms(aLocation, plan)
+                if len(done) >= _MAKE_INSTANCES_CACHE_SIZE:
+                    done.popitem(last=False)
+            done[key] = terms
+            yield self._sumInstanceTerms(terms)
+
+    def _makeInstance(self, aLocation, plan):
+        """
+            Calculate an instance, aLocation is in bent space.
+            plan: the compiled plan of this mutator or None.
+        """
+        return self._sumInstanceTerms(self._getInstanceTerms(aLocation, plan))
+
+    def _getInstanceTerms(self, aLocation, plan):
+        """
+            Return the (factor, mathItem) pairs that add up to the instance
+            at aLocation, and whether the neutral is added to the sum.
+            aLocation is in bent space.
+        """
+        if self._masters is not None:
+            weights = self.getMasterWeights(aLocation)
+            if not aLocation.isAmbivalent():
+                return self._getWeightTerms(weights), True
+            termsX = self._getWeightTerms([x for x, y in weights])
+            termsY = self._getWeightTerms([y for x, y in weights])
+            return _splitTerms(termsX, termsY), True
+        if self._grid is not None:
+            if not aLocation.isAmbivalent():
+                return self._grid.getTerms(aLocation-self._bias), True
+            locX, locY = aLocation.split()
+            return _splitTerms(self._grid.getTerms(locX-self._bias), self._grid.getTerms(locY-self._bias)), True
         if not aLocation.isAmbivalent():
-            instanceObject = self.getInstance(aLocation-self._bias)
+            terms = [(f, item) for f, item, name in self._getFactors(aLocation-self._bias, False, False, plan)]
         else:
+            # one scaled copy of each delta, with the x and y factors together
             locX, locY = aLocation.split()
-            instanceObject = self.getInstance(locX-self._bias)*(1,0)+self.getInstance(locY-self._bias)*(0,1)
-        return instanceObject+self._neutral
+            factorsX = [(f, item) for f, item, name in self._getFactors(locX-self._bias, False, False, plan)]
+            factorsY = [(f, item) for f, item, name in self._getFactors(locY-self._bias, False, False, plan)]
+            terms = _splitTerms(factorsX, factorsY)
+        return terms, True
+
+    def _getWeightTerms(self, weights):
+        """
+            Return the (weight, master - neutral) pairs for the master
+            weights, with the origin delta, sorted like the factors.
+            The differences with the neutral are made once.
+        """
+        if self._masterDeltas is None:
+            neutral = self._neutral
+            deltas = [master-neutral for master in self._masters]
+            deltas[list(self._weights.getNeutral()).index(1)] = None
+            self._masterDeltas = neutral-neutral, deltas
+        origin, deltas = self._masterDeltas
+        terms = [(1, origin)]
+        for weight, delta in zip(weights, deltas):
+            if delta is None or -_EPSILON < weight < _EPSILON:
+                continue
+            terms.append((weight, delta))
+        return sorted(terms, key=itemgetter(0), reverse=True)
+
+    def _sumInstanceTerms(self, terms):
+        """
+            Add up the terms of _getInstanceTerms in a new instance object.
+        """
+        terms, addNeutral = terms
+        total = None
+        for f, item in terms:
+            if total is None:
+                total = item * f
+                continue
+            total = _addScaled(total, item, f)
+        if total is None:
+            total = 0 * self._neutral
+        if addNeutral:
+            total = _addScaled(total, self._neutral)
+        return total
+
+    def getMasterWeights(self, aLocation, bend=False):
+        """
+            Return the weight of each master at aLocation, in the order the
+            masters were given to buildMutator. The instance is the sum of
+            weight * master, or the neutral plus the sum of
+            weight * (master - neutral). For an ambivalent location the weights are
+            (x, y) tuples.
+            aLocation: expected to be in input space
+        """
+        if self._weights is None:
+            if self._masterLocations is None:
+                raise MutatorError("Master weights need the master locations from buildMutator.")
+            self._weights = _getMasterWeightsMutator(self._masterLocations.key, self._bias)
+        aLocation = self.makeLocation(aLocation)
+        if bend:
+            aLocation = self._bender(aLocation)
+        if not aLocation.isAmbivalent():
+            return list(self._weights.makeInstance(aLocation))
+        locX, locY = aLocation.split()
+        return list(zip(self._weights.makeInstance(locX), self._weights.makeInstance(locY)))
+
+    def getFactorMatrix(self, locations, axisOnly=False):
+        """
+            Return a numpy array with the factors of all deltas for many locations,
+            one row per location and one column per delta, in the order of
+            sorted(self.items()). The factors include the zero factors, like
+            getFactors(aLocation, allFactors=True).
+            With the deltas as rows of a matrix D the instances are
+            numpy.dot(F, D), relative to the neutral.
+            locations: a list of Location objects or a LocationArray,
+            expected to be in bent space.
+        """
+        if numpy is None:
+            raise MutatorError("getFactorMatrix needs numpy.")
+        plan = self._plan
+        if plan is None:
+            plan = _EvaluationPlan(self)
+        if isinstance(locations, LocationArray):
+            if locations.isAmbivalent().any():
+                raise MutatorError("getFactorMatrix can not use ambivalent locations.", locations)
+            return plan.getFactorMatrix(locations.getValues(plan.axisNames), axisOnly)
+        values = numpy.zeros((len(locations), len(plan.axisNames)))
+        for row, aLocation in enumerate(locations):
+            for column, name in enumerate(plan.axisNames):
+                value = aLocation.get(name, 0)
+                if isinstance(value, tuple):
+                    raise MutatorError("getFactorMatrix can not use ambivalent locations.", aLocation)
+                values[row, column] = value
+        return plan.getFactorMatrix(values, axisOnly)
 
     def getFactors(self, aLocation, axisOnly=False, allFactors=False):
         """
             Return a list of all factors and math items at aLocation.
             factor, mathItem, deltaName
             all = True: include factors that are zero or near-zero
+            Neither aLocation nor the mutator are changed.
+        """
+        return self._getFactors(aLocation, axisOnly, allFactors, self._plan)
+
+    def _getFactors(self, aLocation, axisOnly, allFactors, plan):
+        """
+            Return the factors from the factor cache, or calculate them
+            with the plan, if there is one.
         """
+        cache = self._factorCache
+        if cache is not None:
+            key = (_quantizeLocation(aLocation, cache.quantum), axisOnly, allFactors)
+            deltas = cache.get(key)
+            if deltas is None:
+                deltas = self._calcFactors(aLocation, axisOnly, allFactors, plan)
+                cache.put(key, deltas)
+            return list(deltas)
+        return self._calcFactors(aLocation, axisOnly, allFactors, plan)
+
+    def _calcFactors(self, aLocation, axisOnly, allFactors, plan):
+        if plan is not None:
+            return plan.getFactors(aLocation, axisOnly, allFactors)
         deltas = []
+        aLocation = Location(aLocation)
         aLocation.expand(self.getAxisNames())
-        limits = getLimits(self._allLocations(), aLocation)
+        limits = self._getIndex().getLimits(aLocation)
         for deltaLocationTuple, (mathItem, deltaName) in sorted(self.items()):
             deltaLocation = Location(deltaLocationTuple)
             deltaLocation.expand( self.getAxisNames())
@@ -262,15 +912,9 @@ class Mutator(dict):
         if deltaAxis is None:
             relative.append(1)
         elif deltaAxis:
-            deltasOnSameAxis = self._axes.get(deltaAxis, [])
-            d = ((deltaAxis, 0),)
-            if d not in deltasOnSameAxis:
-                deltasOnSameAxis.append(d)
-            if len(deltasOnSameAxis) == 1:
-                relative.append(aLocation[deltaAxis] * deltaLocation[deltaAxis])
-            else:
-                factor =  self._calcOnAxisFactor(aLocation, deltaAxis, deltasOnSameAxis, deltaLocation)
-                relative.append(factor)
+            # the on-axis values and the origin come from the index
+            factor =  self._calcOnAxisFactor(aLocation, deltaAxis, (), deltaLocation)
+            relative.append(factor)
         elif not axisOnly:
             factor = self._calcOffAxisFactor(aLocation, deltaLocation, limits)
             relative.append(factor)
@@ -293,52 +937,13 @@ class Mutator(dict):
         else:
             f = aLocation[deltaAxis]
             v = deltaLocation[deltaAxis]
-        i = []
-        iv = {}
-        for value in deltasOnSameAxis:
-            iv[Location(value)[deltaAxis]]=1
-        i = sorted(iv.keys())
-        r = 0
-        B, M, A = [], [], []
-        mA, mB, mM = None, None, None
-        for value in i:
-            if value < f: B.append(value)
-            elif value > f: A.append(value)
-            else: M.append(value)
-        if len(B) > 0:
-            mB = max(B)
-            B.sort()
-        if len(A) > 0:
-            mA = min(A)
-            A.sort()
-        if len(M) > 0:
-            mM = min(M)
-            M.sort()
-        if mM is not None:
-            if ((f-_EPSILON <  v) and (f+_EPSILON > v)) or f==v: r = 1
-            else: r = 0
-        elif mB is not None and mA is not None:
-            if v < mB or v > mA: r = 0
-            else:
-                if v == mA:
-                    r = float(f-mB)/(mA-mB)
-                else:
-                    r = float(f-mA)/(mB-mA)
-        elif mB is None and mA is not None:
-            if v==A[1]:
-                r = float(f-A[0])/(A[1]-A[0])
-            elif v == A[0]:
-                r = float(f-A[1])/(A[0]-A[1])
-            else:
-                r = 0
-        elif  mB is not None and mA is None:
-            if v == B[-2]:
-                r = float(f-B[-1])/(B[-2]-B[-1])
-            elif v == mB:
-                r = float(f-B[-2])/(B[-1]-B[-2])
-            else:
-                r = 0
-        return r
+        values = self._getIndex().axisPoints.get(deltaAxis)
+        if values is None:
+            iv = {}
+            for value in deltasOnSameAxis:
+                iv[Location(value)[deltaAxis]]=1
+            values = sorted(iv.keys())
+        return _onAxisFactor(f, v, values)
 
     def _calcOffAxisFactor(self, aLocation, deltaLocation, limits):
         """
@@ -346,50 +951,939 @@ class Mutator(dict):
         """
         relative = []
         for dim in limits.keys():
-            f = aLocation[dim]
-            v = deltaLocation[dim]
-            mB, M, mA = limits[dim]
-            r = 0
-            if mA is not None and v > mA:
-                relative.append(0)
-                continue
-            elif mB is not None and v < mB:
-                relative.append(0)
-                continue
-            if f < v-_EPSILON:
-                if mB is None:
-                    if M is not None and mA is not None:
-                        if v == M:
-                            r = (float(max(f,mA)-min(f, mA))/float(max(M,mA)-min(M, mA)))
-                        else:
-                            r = -(float(max(f,mA)-min(f, mA))/float(max(M,mA)-min(M, mA)) -1)
-                    else: r = 0
-                elif mA is None: r = 0
-                else: r = float(f-mB)/(mA-mB)
-            elif f > v+_EPSILON:
-                if mB is None: r = 0
-                elif mA is None:
-                    if M is not None and mB is not None:
-                        if v == M:
-                            r = (float(max(f,mB)-min(f, mB))/(max(mB, M)-min(mB, M)))
-                        else:
-                            r = -(float(max(f,mB)-min(f, mB))/(max(mB, M)-min(mB, M)) - 1)
-                    else: r = 0
-                else: r = float(mA-f)/(mA-mB)
-            else: r = 1
-            relative.append(r)
+            relative.append(_offAxisFactor(aLocation[dim], deltaLocation[dim], limits[dim]))
         f = 1
         for i in relative:
             f *= i
         return f
 
 
+_SERIAL_VERSION = 1
+_FILE_VERSION = 2
+_FILE_MAGIC = b"MUTM"
+_FILE_HEADER = "<4sII"
+
+# The names that a mutator file may refer to. Saved files use these
+# names, keep them here when a class or function is renamed or moved.
+_LOADABLE_NAMES = set([
+    ('mutatorMath.objects.mutator', 'Mutator'),
+    ('mutatorMath.objects.mutator', '_mutatorFromState'),
+    ('mutatorMath.objects.mutator', '_MasterWeights'),
+    ('mutatorMath.objects.mutator', 'noBend'),
+    ('mutatorMath.objects.bender', 'Bender'),
+    ('mutatorMath.objects.bender', 'WarpMutator'),
+    ('mutatorMath.objects.bender', '_WarpMap'),
+    ('mutatorMath.objects.bender', 'noBend'),
+    ('mutatorMath.objects.mathArray', 'MathArray'),
+    ('mutatorMath.objects.location', 'Location'),
+    ('mutatorMath.objects.location', 'FrozenLocation'),
+    ('numpy', 'ndarray'),
+    ('numpy', 'dtype'),
+    ('numpy.core.multiarray', '_reconstruct'),
+    ('numpy.core.multiarray', 'scalar'),
+    ('numpy._core.multiarray', '_reconstruct'),
+    ('numpy._core.multiarray', 'scalar'),
+    ('collections', 'OrderedDict'),
+    ('_codecs', 'encode'),
+    ('__builtin__', 'set'),
+    ('__builtin__', 'frozenset'),
+    ('builtins', 'set'),
+    ('builtins', 'frozenset'),
+    ])
+
+def _mutatorFromState(cls, state):
+    """
+        Make a mutator from the state of Mutator.__reduce__.
+    """
+    if state.get('version') != _SERIAL_VERSION:
+        raise MutatorError("Can not read a mutator of version %s." % state.get('version'))
+    m = cls()
+    m.setBender(state['bender'])
+    m.setBias(Location(state['bias']))
+    m._neutral = state['neutral']
+    for key, mathItem, deltaName in state['deltas']:
+        m._setDelta(key, mathItem, deltaName)
+    if state['masterLocations'] is not None:
+        m._masterLocations = _internKey(tuple(state['masterLocations']))
+        m._masterObjects = state['masterObjects']
+        if state['punchedKeys'] is not None:
+            m._punchedKeys = _internKey(tuple(sorted(state['punchedKeys'].items())))
+    if state['masterWeights']:
+        m._weights = _getMasterWeightsMutator(m._masterLocations.key, m._bias)
+        m._masters = m._masterObjects
+    if state['grid']:
+        m._grid = _GridEvaluator.fromItems([(loc-m._bias, obj) for loc, obj in zip(m._getMasterLocations(), m._masterObjects)])
+    if state['frozen']:
+        m.freeze()
+    elif state['compiled']:
+        m.compile()
+    return m
+
+
+class _MutatorPickler(pickle.Pickler):
+
+    """
+        Pickle a mutator with references to the benders that are stored
+        once for the whole file.
+    """
+
+    def __init__(self, f, benders):
+        pickle.Pickler.__init__(self, f, 2)
+        self._benders = dict([(id(bender), i) for i, bender in enumerate(benders)])
+
+    def persistent_id(self, obj):
+        i = self._benders.get(id(obj))
+        if i is None:
+            return None
+        return 'bender', i
+
+
+class _MutatorUnpickler(pickle.Unpickler):
+
+    """
+        Unpickle the data of a mutator file, with only the classes and
+        functions in _LOADABLE_NAMES, the classes of fontMath and the
+        classes given to loadMutators.
+    """
+
+    def __init__(self, f, benders=(), classes=()):
+        pickle.Unpickler.__init__(self, f)
+        self._benders = benders
+        self._classes = dict([((cls.__module__, cls.__name__), cls) for cls in classes])
+
+    def find_class(self, module, name):
+        cls = self._classes.get((module, name))
+        if cls is not None:
+            return cls
+        if (module, name) in _LOADABLE_NAMES:
+            return pickle.Unpickler.find_class(self, module, name)
+        if module == 'fontMath' or module.startswith('fontMath.'):
+            cls = pickle.Unpickler.find_class(self, module, name)
+            if isinstance(cls, type):
+                return cls
+        raise MutatorError("A mutator file can not refer to %s.%s." % (module, name))
+
+    def persistent_load(self, pid):
+        kind, i = pid
+        return self._benders[i]
+
+
+def _loadData(data, benders=(), classes=()):
+    return _MutatorUnpickler(io.BytesIO(data), benders, classes).load()
+
+
+def saveMutators(path, mutators):
+    """
+        Write a dictionary of mutators to a file that loadMutators can read.
+        The file has a header with a version, an index and a pickle per mutator.
+        A bender that is shared by mutators is stored once, with the index.
+    """
+    names = sorted(mutators.keys())
+    benders = []
+    for name in names:
+        bender = mutators[name]._bender
+        if not [b for b in benders if b is bender]:
+            benders.append(bender)
+    data = []
+    for name in names:
+        f = io.BytesIO()
+        _MutatorPickler(f, benders).dump(mutators[name])
+        data.append(f.getvalue())
+    index = {}
+    offset = 0
+    for name, d in zip(names, data):
+        index[name] = offset, len(d)
+        offset += len(d)
+    index = pickle.dumps((index, benders), 2)
+    f = open(path, 'wb')
+    try:
+        f.write(struct.pack(_FILE_HEADER, _FILE_MAGIC, _FILE_VERSION, len(index)))
+        f.write(index)
+        for d in data:
+            f.write(d)
+    finally:
+        f.close()
+
+
+def loadMutators(path, classes=()):
+    """
+        Open a file written by saveMutators. The file is memory mapped and
+        a mutator is only unpickled when it is asked for, so opening a file
+        with many mutators is fast.
+        The mutators are unpickled, only open files from a source you trust.
+        The file can only refer to the classes of mutatorMath, fontMath and
+        numpy that a mutator needs.
+        classes: other classes of the math objects in the file.
+        Return a read only mapping of the mutators by name.
+    """
+    return _MutatorFile(path, classes)
+
+
+class _MutatorFile(object):
+
+    """
+        The mutators in a file written by saveMutators.
+    """
+
+    def __init__(self, path, classes=()):
+        f = open(path, 'rb')
+        try:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            f.close()
+        headerSize = struct.calcsize(_FILE_HEADER)
+        magic, version, indexSize = struct.unpack(_FILE_HEADER, self._data[:headerSize])
+        if magic != _FILE_MAGIC:
+            self.close()
+            raise MutatorError("Not a mutator file.", path)
+        if version != _FILE_VERSION:
+            self.close()
+            raise MutatorError("Can not read a mutator file of version %s." % version, path)
+        self._classes = classes
+        self._index, self._benders = _loadData(self._data[headerSize:headerSize+indexSize], classes=classes)
+        self._start = headerSize+indexSize
+        self._mutators = {}
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __iter__(self):
+        return iter(sorted(self._index.keys()))
+
+    def keys(self):
+        return sorted(self._index.keys())
+
+    def __getitem__(self, name):
+        m = self._mutators.get(name)
+        if m is None:
+            offset, size = self._index[name]
+            offset += self._start
+            m = _loadData(self._data[offset:offset+size], self._benders, self._classes)
+            self._mutators[name] = m
+        return m
+
+    def get(self, name, default=None):
+        if name not in self._index:
+            return default
+        return self[name]
+
+    def close(self):
+        self._data.close()
+
+
+class _FactorCache(object):
+
+    """
+        A least recently used cache of factor lists.
+    """
+
+    def __init__(self, maxSize, quantum):
+        if maxSize < 1:
+            raise MutatorError("The factor cache needs a size of at least 1.")
+        if not quantum > 0:
+            raise MutatorError("The factor cache needs a quantum of more than 0.", quantum)
+        self.maxSize = maxSize
+        self.quantum = quantum
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.pop(key, None)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._items[key] = value
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = value
+            while len(self._items) > self.maxSize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def info(self):
+        return dict(hits=self.hits, misses=self.misses, size=len(self._items), maxSize=self.maxSize)
+
+
+def _quantizeLocation(aLocation, quantum):
+    """
+        Return a hashable key for aLocation with the values rounded to
+        multiples of quantum. Zero values are left out.
+    """
+    key = []
+    for name, value in aLocation.items():
+        if isinstance(value, tuple):
+            value = tuple([_quantizeValue(v, quantum) for v in value])
+            if not any(value):
+                continue
+        else:
+            value = _quantizeValue(value, quantum)
+            if not value:
+                continue
+        key.append((name, value))
+    return tuple(sorted(key))
+
+
+def _quantizeValue(value, quantum):
+    try:
+        return int(round(value/quantum))
+    except (OverflowError, ValueError):
+        # too large to round, or not a number: only the same value matches
+        return value
+
+
+class _AxisIndex(object):
+
+    """
+        The sorted coordinates of a set of delta locations, per axis.
+        Finds the limits and the on-axis breakpoints around a location
+        with a binary search instead of comparing all locations.
+    """
+
+    def __init__(self, locationTuples):
+        values = {}
+        axisPoints = {}
+        for locationTuple in locationTuples:
+            for name, value in locationTuple:
+                if name not in values:
+                    values[name] = {}
+                values[name][value] = None
+            location = FrozenLocation(locationTuple)
+            name = location.isOnAxis()
+            if name is None or name is False:
+                continue
+            # the origin is on every axis
+            if name not in axisPoints:
+                axisPoints[name] = {0: None}
+            axisPoints[name][location[name]] = None
+        self.axisNames = sorted(values.keys())
+        # all values per axis, and the values that are not near zero
+        self.values = {}
+        self.nonZeroValues = {}
+        for name, axisValues in values.items():
+            axisValues = sorted(axisValues.keys())
+            self.values[name] = axisValues
+            self.nonZeroValues[name] = [v for v in axisValues if not (-_EPSILON < v < _EPSILON)]
+        # on-axis breakpoints per axis
+        self.axisPoints = dict([(name, sorted(points.keys())) for name, points in axisPoints.items()])
+
+    def getLimits(self, aLocation):
+        """
+            Same as getLimits(locations, aLocation) for the indexed locations.
+        """
+        limits = {}
+        for name in self.axisNames:
+            limit = self.getLimit(name, aLocation.get(name, 0))
+            if limit is not None:
+                limits[name] = limit
+        return limits
+
+    def getLimit(self, name, f):
+        """
+            Return the (min, match, max) limit tuple of axis name for value f,
+            or None if the axis does not contribute to the off-axis factors.
+        """
+        if -_EPSILON < f < _EPSILON:
+            # values near zero on both sides do not count
+            values = self.nonZeroValues[name]
+        else:
+            values = self.values[name]
+        if not values:
+            return None
+        # values[:lo] are less than f, values[hi:] are more than f
+        lo = _bisectPredicate(values, lambda v: not (f > v + _EPSILON))
+        hi = _bisectPredicate(values, lambda v: f < v - _EPSILON, lo)
+        less = values[max(0, lo-2):lo]
+        match = values[lo:hi]
+        more = values[hi:hi+2]
+        # the origin is always a limit
+        if f > 0:
+            less = sorted(set(less + [0]))[-2:]
+        elif f < 0:
+            more = sorted(set(more + [0]))[:2]
+        else:
+            match = match + [0]
+        if not less and more:
+            # extrapolation < min
+            if match:
+                return None, match[0], None
+            elif len(more) > 1:
+                return None, more[0], more[1]
+        elif less and not more:
+            # extrapolation > max
+            if match:
+                return None, match[0], None
+            elif len(less) > 1:
+                return less[-2], less[-1], None
+        else:
+            if match:
+                return None, match[0], None
+            return less[-1], None, more[0]
+        return None
+
+
+def _bisectPredicate(values, predicate, lo=0):
+    """
+        Return the index of the first item in the sorted values for which
+        predicate is true. predicate has to be false for all items before it.
+    """
+    hi = len(values)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if predicate(values[mid]):
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+class _EvaluationPlan(object):
+
+    """
+        Everything a Mutator needs to calculate an instance that does not
+        depend on the location of the instance. Built by Mutator.compile().
+    """
+
+    def __init__(self, mutator):
+        self.index = mutator._getIndex()
+        self.axisNames = self.index.axisNames
+        self.axisPoints = self.index.axisPoints
+        self.deltas = []
+        # the deltas without an axis, and the on-axis deltas per axis
+        self.originDeltas = []
+        self.axisDeltas = {}
+        self.offAxisDeltas = []
+        for index, (deltaLocationTuple, (mathItem, deltaName)) in enumerate(sorted(mutator.items())):
+            deltaAxis = FrozenLocation(deltaLocationTuple).isOnAxis()
+            deltaLocation = Location(deltaLocationTuple)
+            deltaLocation.expand(self.axisNames)
+            self.deltas.append((deltaLocation, deltaAxis, mathItem, deltaName))
+            if deltaAxis is None:
+                self.originDeltas.append((index, 1, mathItem, deltaName))
+            elif deltaAxis:
+                if deltaAxis not in self.axisDeltas:
+                    self.axisDeltas[deltaAxis] = []
+                self.axisDeltas[deltaAxis].append((index, deltaLocation[deltaAxis], mathItem, deltaName))
+            else:
+                self.offAxisDeltas.append((index, deltaLocation, mathItem, deltaName))
+        # support regions: the on-axis deltas sorted by their value
+        self.axisDeltaValues = {}
+        for axisName, deltas in self.axisDeltas.items():
+            deltas.sort(key=itemgetter(1, 0))
+            self.axisDeltaValues[axisName] = [v for index, v, mathItem, deltaName in deltas]
+        # support regions: for each axis the sorted off-axis coordinates,
+        # with a bitmask of the off-axis deltas at or below each coordinate
+        self.offAxisValues = {}
+        self.offAxisMasks = {}
+        for axisName in self.axisNames:
+            masks = {}
+            for bit, (index, deltaLocation, mathItem, deltaName) in enumerate(self.offAxisDeltas):
+                v = deltaLocation[axisName]
+                masks[v] = masks.get(v, 0) | (1 << bit)
+            values = sorted(masks.keys())
+            cumulative = [0]
+            for v in values:
+                cumulative.append(cumulative[-1] | masks[v])
+            self.offAxisValues[axisName] = values
+            self.offAxisMasks[axisName] = cumulative
+        self.allOffAxis = (1 << len(self.offAxisDeltas)) - 1
+        # the off-axis deltas grouped by the axes where they are not zero
+        axisBits = dict([(name, 1 << i) for i, name in enumerate(self.axisNames)])
+        self.offAxisGroups = {}
+        for bit, (index, deltaLocation, mathItem, deltaName) in enumerate(self.offAxisDeltas):
+            axes = 0
+            for name, v in deltaLocation.items():
+                if not (-_EPSILON <= v <= _EPSILON):
+                    axes |= axisBits[name]
+            self.offAxisGroups[axes] = self.offAxisGroups.get(axes, 0) | (1 << bit)
+        self.axisBits = axisBits
+
+    def getFactors(self, aLocation, axisOnly=False, allFactors=False):
+        """
+            Same as Mutator.getFactors, aLocation is not changed.
+            Only the deltas whose support region contains aLocation are
+            calculated, unless allFactors is True.
+            Only the active axes of aLocation are visited: on an axis where
+            aLocation is zero the on-axis factors are zero, and an off-axis
+            delta has a factor of 1 if it is zero there too and 0 otherwise.
+        """
+        if allFactors:
+            current = Location(aLocation)
+            current.expand(self.axisNames)
+            return self._getAllFactors(current, axisOnly)
+        if not isinstance(aLocation, Location):
+            aLocation = Location(aLocation)
+        active = [name for name in aLocation.getActiveAxes() if name in self.axisBits]
+        terms = list(self.originDeltas)
+        for axisName in active:
+            if axisName in self.axisDeltas:
+                terms.extend(self.getAxisFactors(axisName, aLocation[axisName]))
+        if not axisOnly and self.offAxisDeltas:
+            activeBits = 0
+            for name in active:
+                activeBits |= self.axisBits[name]
+            candidates = 0
+            for axes, group in self.offAxisGroups.items():
+                if not axes & ~activeBits:
+                    candidates |= group
+            limits = []
+            for dim in active:
+                limit = self.index.getLimit(dim, aLocation[dim])
+                if limit is None:
+                    continue
+                limits.append((dim, aLocation[dim], limit))
+                if not candidates:
+                    break
+                lo, hi = _offAxisSupport(aLocation[dim], limit, self.offAxisValues[dim])
+                cumulative = self.offAxisMasks[dim]
+                candidates &= cumulative[hi] ^ cumulative[lo]
+            while candidates:
+                lowest = candidates & -candidates
+                candidates ^= lowest
+                index, deltaLocation, mathItem, deltaName = self.offAxisDeltas[lowest.bit_length()-1]
+                factor = 1
+                for dim, f, limit in limits:
+                    factor *= _offAxisFactor(f, deltaLocation[dim], limit)
+                if not (factor-_EPSILON < 0 < factor+_EPSILON):
+                    terms.append((index, factor, mathItem, deltaName))
+        # keep the order of the deltas for equal factors
+        terms.sort(key=itemgetter(0))
+        deltas = [(factor, mathItem, deltaName) for index, factor, mathItem, deltaName in terms]
+        deltas = sorted(deltas, key=itemgetter(0), reverse=True)
+        return deltas
+
+    def _getAllFactors(self, current, axisOnly):
+        """
+            Calculate the factors for all deltas, including the zero factors.
+        """
+        limits = None
+        deltas = []
+        for deltaLocation, deltaAxis, mathItem, deltaName in self.deltas:
+            if deltaAxis is None:
+                factor = 1
+            elif deltaAxis:
+                factor = _onAxisFactor(current[deltaAxis], deltaLocation[deltaAxis], self.axisPoints[deltaAxis])
+            elif axisOnly:
+                factor = 0
+            else:
+                if limits is None:
+                    limits = self.index.getLimits(current)
+                factor = 1
+                for dim, limit in limits.items():
+                    factor *= _offAxisFactor(current[dim], deltaLocation[dim], limit)
+            deltas.append((factor, mathItem, deltaName))
+        deltas = sorted(deltas, key=itemgetter(0), reverse=True)
+        return deltas
+
+    def getFactorMatrix(self, values, axisOnly=False):
+        """
+            Calculate the factors of all deltas, including the zero factors,
+            for an array of locations with one column per axis in axisNames.
+        """
+        count = values.shape[0]
+        columns = dict([(name, values[:, i]) for i, name in enumerate(self.axisNames)])
+        factors = numpy.zeros((count, len(self.deltas)))
+        for index, factor, mathItem, deltaName in self.originDeltas:
+            factors[:, index] = 1
+        for axisName, deltas in self.axisDeltas.items():
+            points = numpy.array(self.axisPoints[axisName], dtype=float)
+            for index, v, mathItem, deltaName in deltas:
+                factors[:, index] = _onAxisFactorArray(columns[axisName], v, points)
+        if axisOnly or not self.offAxisDeltas:
+            return factors
+        limits = {}
+        for name in self.axisNames:
+            limits[name] = _limitArrays(columns[name], self.index.values[name], self.index.nonZeroValues[name])
+        for index, deltaLocation, mathItem, deltaName in self.offAxisDeltas:
+            factor = numpy.ones(count)
+            for name in self.axisNames:
+                factor *= _offAxisFactorArray(columns[name], deltaLocation[name], limits[name])
+            factors[:, index] = factor
+        return factors
+
+    def getAxisFactors(self, axisName, value):
+        """
+            Return the non-zero factors of the deltas on this axis for this axis value,
+            as (index, factor, mathItem, deltaName) with the index in the delta order.
+        """
+        factors = []
+        values = self.axisPoints[axisName]
+        low, high = _onAxisSupport(value, values)
+        deltaValues = self.axisDeltaValues[axisName]
+        lo = bisect_left(deltaValues, low)
+        hi = bisect_right(deltaValues, high, lo)
+        for index, v, mathItem, deltaName in self.axisDeltas[axisName][lo:hi]:
+            factor = _onAxisFactor(value, v, values)
+            if not (factor-_EPSILON < 0 < factor+_EPSILON):
+                factors.append((index, factor, mathItem, deltaName))
+        return factors
+
+
+class _GridEvaluator(object):
+
+    """
+        Multilinear interpolation of masters on a full rectangular grid.
+        For these masters the deltas of a mutator add up to the same instances,
+        but here only the masters on the corners of the cell around a location
+        are used. Outside the grid the outer cells are extrapolated.
+        Like the deltas of a mutator, the corners are added as the difference
+        with the neutral, and the neutral is added last.
+    """
+
+    def __init__(self, axisNames, axisValues, neutral, deltas):
+        # axisValues: the sorted grid values for each axis in axisNames
+        # deltas: master - neutral by the tuple of grid value indices of the
+        # master, there is none for the neutral
+        self.axisNames = axisNames
+        self.axisValues = axisValues
+        self.origin = neutral - neutral
+        self.deltas = deltas
+
+    def fromItems(cls, items):
+        """
+            Return a grid for the (location, obj) items, with the locations
+            relative to the bias. Return None if the locations do not make a full grid.
+        """
+        axisNames = set()
+        for loc, obj in items:
+            axisNames.update(loc.keys())
+        axisNames = sorted(axisNames)
+        values = [{} for name in axisNames]
+        points = []
+        for loc, obj in items:
+            point = []
+            for i, name in enumerate(axisNames):
+                v = loc.get(name, 0)
+                if isinstance(v, tuple):
+                    return None
+                values[i][v] = None
+                point.append(v)
+            points.append((point, obj))
+        axisValues = [sorted(v.keys()) for v in values]
+        size = 1
+        for v in axisValues:
+            if 0 not in v:
+                return None
+            for a, b in zip(v[:-1], v[1:]):
+                if b - a <= _EPSILON:
+                    return None
+            size *= len(v)
+        if size != len(items):
+            return None
+        masters = {}
+        for point, obj in points:
+            key = tuple([bisect_left(axisValues[i], v) for i, v in enumerate(point)])
+            if key in masters:
+                return None
+            masters[key] = obj
+        neutralKey = tuple([v.index(0) for v in axisValues])
+        neutral = masters.pop(neutralKey)
+        deltas = dict([(key, obj-neutral) for key, obj in masters.items()])
+        return cls(axisNames, axisValues, neutral, deltas)
+    fromItems = classmethod(fromItems)
+
+    def getTerms(self, aLocation):
+        """
+            Return the (factor, delta) pairs of the corners of the cell
+            around aLocation, relative to the bias, and the origin delta.
+            Sorted like the factors of a mutator, without the zero factors.
+        """
+        corners = [((), 1)]
+        for name, values in zip(self.axisNames, self.axisValues):
+            weights = _gridWeights(aLocation.get(name, 0), values)
+            corners = [(key+(i,), w*wi) for key, w in corners for i, wi in weights]
+        terms = [(1, self.origin)]
+        for key, w in corners:
+            delta = self.deltas.get(key)
+            if delta is None or -_EPSILON < w < _EPSILON:
+                continue
+            terms.append((w, delta))
+        return sorted(terms, key=itemgetter(0), reverse=True)
+
+
+def _splitTerms(factorsX, factorsY):
+    """
+        Merge two lists of (factor, mathItem) pairs, the first for the x
+        values, the second for the y values, into one list with an (x, y)
+        factor for each item, so each item is scaled once.
+    """
+    split = {}
+    order = []
+    for axis, factors in enumerate((factorsX, factorsY)):
+        for f, item in factors:
+            key = id(item)
+            if key not in split:
+                split[key] = [0, 0, item]
+                order.append(key)
+            split[key][axis] += f
+    terms = []
+    for key in order:
+        fx, fy, item = split[key]
+        if fx == fy:
+            terms.append((fx, item))
+        else:
+            terms.append(((fx, fy), item))
+    return terms
+
+
+def _gridWeights(f, values):
+    """
+        Return the (index, weight) pairs for value f on one axis of a grid.
+    """
+    if len(values) == 1:
+        return [(0, 1)]
+    i = bisect_left(values, f)
+    if i < len(values) and values[i] == f:
+        return [(i, 1)]
+    i = min(max(i, 1), len(values)-1) - 1
+    t = float(f-values[i])/(values[i+1]-values[i])
+    return [(i, 1-t), (i+1, t)]
+
+
+def _onAxisFactorArray(f, v, points):
+    """
+        Same as _onAxisFactor, for an array of axis values f.
+        points: array with the sorted breakpoints on this axis.
+    """
+    count = len(points)
+    lo = numpy.searchsorted(points, f, side='left')
+    hi = numpy.searchsorted(points, f, side='right')
+    exact = hi > lo
+    r = numpy.where(((f-_EPSILON < v) & (f+_EPSILON > v)) | (f == v), 1.0, 0.0)
+    r = numpy.where(exact, r, 0.0)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        # between two breakpoints
+        mB = points[numpy.clip(lo-1, 0, count-1)]
+        mA = points[numpy.clip(lo, 0, count-1)]
+        between = numpy.where(v == mA, (f-mB)/(mA-mB), (f-mA)/(mB-mA))
+        between = numpy.where((v < mB) | (v > mA), 0.0, between)
+        r = numpy.where(~exact & (lo > 0) & (lo < count), between, r)
+        # extrapolation
+        if v == points[1]:
+            below = (f-points[0])/(points[1]-points[0])
+        elif v == points[0]:
+            below = (f-points[1])/(points[0]-points[1])
+        else:
+            below = numpy.zeros(len(f))
+        r = numpy.where(~exact & (lo == 0), below, r)
+        if v == points[-2]:
+            above = (f-points[-1])/(points[-2]-points[-1])
+        elif v == points[-1]:
+            above = (f-points[-2])/(points[-1]-points[-2])
+        else:
+            above = numpy.zeros(len(f))
+        r = numpy.where(~exact & (lo == count), above, r)
+    return r
+
+
+def _limitArrays(f, values, nonZeroValues):
+    """
+        Same as _AxisIndex.getLimit, for an array of axis values f.
+        Return the arrays (mB, M, mA, hasB, hasM, hasA) of the limit tuples,
+        a location without a limit for this axis has none of the three.
+    """
+    zero = (-_EPSILON < f) & (f < _EPSILON)
+    near = []
+    for v in (values, nonZeroValues):
+        v = numpy.array(v, dtype=float)
+        # values[:lo] are less than f, values[hi:] are more than f
+        lo = numpy.searchsorted(v + _EPSILON, f, side='left')
+        hi = numpy.searchsorted(v - _EPSILON, f, side='right')
+        padded = numpy.concatenate(([numpy.nan, numpy.nan], v, [numpy.nan, numpy.nan]))
+        near.append((padded[lo+1], padded[lo], padded[hi+2], padded[hi+3], hi > lo))
+    (L1, L2, R1, R2, match) = [numpy.where(zero, b, a) for a, b in zip(near[0], near[1])]
+    hasL1 = ~numpy.isnan(L1)
+    hasL2 = ~numpy.isnan(L2)
+    hasR1 = ~numpy.isnan(R1)
+    hasR2 = ~numpy.isnan(R2)
+    # the origin is always a limit
+    positive = f > 0
+    negative = f < 0
+    match = match | (~positive & ~negative)
+    # less: top two of L1, L2 and zero for positive f
+    lessMax = numpy.where(positive & (~hasL1 | (L1 < 0)), 0.0, L1)
+    lessNext = numpy.where(positive & hasL1 & (L1 < 0), L1, L2)
+    lessNext = numpy.where(positive & hasL1 & (L1 > 0) & ~(hasL2 & (L2 >= 0)), 0.0, lessNext)
+    hasLess = hasL1 | positive
+    hasLessNext = numpy.where(positive, hasL1 & ((L1 != 0) | hasL2), hasL2)
+    # more: first two of R1, R2 and zero for negative f
+    moreMin = numpy.where(negative & (~hasR1 | (R1 > 0)), 0.0, R1)
+    moreNext = numpy.where(negative & hasR1 & (R1 > 0), R1, R2)
+    moreNext = numpy.where(negative & hasR1 & (R1 < 0) & ~(hasR2 & (R2 <= 0)), 0.0, moreNext)
+    hasMore = hasR1 | negative
+    hasMoreNext = numpy.where(negative, hasR1 & ((R1 != 0) | hasR2), hasR2)
+    # without non-zero values there is no limit near zero
+    if not nonZeroValues:
+        match = match & ~zero
+        hasLess = hasLess & ~zero
+        hasMore = hasMore & ~zero
+    # the cases of getLimit
+    belowAll = ~hasLess & hasMore & ~match & hasMoreNext
+    aboveAll = hasLess & ~hasMore & ~match & hasLessNext
+    between = hasLess & hasMore & ~match
+    hasB = aboveAll | between
+    hasM = match | belowAll | aboveAll
+    hasA = belowAll | between
+    mB = numpy.where(aboveAll, lessNext, lessMax)
+    M = numpy.where(belowAll, moreMin, numpy.where(aboveAll, lessMax, 0.0))
+    mA = numpy.where(belowAll, moreNext, moreMin)
+    return mB, M, mA, hasB, hasM, hasA
+
+
+def _offAxisFactorArray(f, v, limits):
+    """
+        Same as _offAxisFactor, for an array of values f and their limit arrays.
+        Where there is no limit the factor is 1.
+    """
+    mB, M, mA, hasB, hasM, hasA = limits
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        extrapolateBelow = numpy.abs(f-mA)/numpy.abs(M-mA)
+        extrapolateBelow = numpy.where(v == M, extrapolateBelow, -(extrapolateBelow-1))
+        extrapolateAbove = numpy.abs(f-mB)/numpy.abs(mB-M)
+        extrapolateAbove = numpy.where(v == M, extrapolateAbove, -(extrapolateAbove-1))
+        less = numpy.where(~hasB, numpy.where(hasM & hasA, extrapolateBelow, 0.0),
+            numpy.where(~hasA, 0.0, (f-mB)/(mA-mB)))
+        more = numpy.where(~hasB, 0.0,
+            numpy.where(~hasA, numpy.where(hasM, extrapolateAbove, 0.0), (mA-f)/(mA-mB)))
+    r = numpy.where(f < v-_EPSILON, less, numpy.where(f > v+_EPSILON, more, 1.0))
+    r = numpy.where((hasA & (v > mA)) | (hasB & (v < mB)), 0.0, r)
+    return numpy.where(hasB | hasM | hasA, r, 1.0)
+
+
+def _onAxisSupport(f, values):
+    """
+        Return the (low, high) range of values of the on-axis deltas
+        that can have a non-zero factor at axis value f.
+        values: the sorted breakpoints on this axis, including the origin.
+    """
+    lo = bisect_left(values, f)
+    hi = bisect_right(values, f, lo)
+    if hi > lo:
+        return f-_EPSILON, f+_EPSILON
+    elif 0 < lo < len(values):
+        return values[lo-1], values[hi]
+    elif lo == 0:
+        return values[0], values[1]
+    return values[-2], values[-1]
+
+
+def _offAxisSupport(f, limit, values):
+    """
+        Return the (lo, hi) slice of the sorted values of the off-axis
+        deltas in one dimension that can have a non-zero factor there.
+        Follows the cases in _offAxisFactor.
+    """
+    mB, M, mA = limit
+    lo = 0
+    hi = len(values)
+    if mB is not None:
+        lo = bisect_left(values, mB)
+    if mA is not None:
+        hi = bisect_right(values, mA)
+    if not (mB is not None and (mA is not None or M is not None)):
+        # values less than f have a zero factor
+        lo = max(lo, _bisectPredicate(values, lambda v: not (f > v + _EPSILON)))
+    if not (mA is not None and (mB is not None or M is not None)):
+        # values more than f have a zero factor
+        hi = min(hi, _bisectPredicate(values, lambda v: f < v - _EPSILON))
+    return lo, max(lo, hi)
+
+
+def _onAxisFactor(f, v, values):
+    """
+        Calculate the factor of the on-axis delta at v for axis value f.
+        values: the sorted breakpoints on this axis, including the origin.
+    """
+    # values[:lo] are less than f, values[hi:] are more than f
+    lo = bisect_left(values, f)
+    hi = bisect_right(values, f, lo)
+    r = 0
+    if hi > lo:
+        if ((f-_EPSILON <  v) and (f+_EPSILON > v)) or f==v: r = 1
+        else: r = 0
+    elif 0 < lo < len(values):
+        mB = values[lo-1]
+        mA = values[hi]
+        if v < mB or v > mA: r = 0
+        else:
+            if v == mA:
+                r = float(f-mB)/(mA-mB)
+            else:
+                r = float(f-mA)/(mB-mA)
+    elif lo == 0:
+        A = values
+        if v==A[1]:
+            r = float(f-A[0])/(A[1]-A[0])
+        elif v == A[0]:
+            r = float(f-A[1])/(A[0]-A[1])
+        else:
+            r = 0
+    else:
+        B = values
+        if v == B[-2]:
+            r = float(f-B[-1])/(B[-2]-B[-1])
+        elif v == B[-1]:
+            r = float(f-B[-2])/(B[-1]-B[-2])
+        else:
+            r = 0
+    return r
+
+
+def _offAxisFactor(f, v, limit):
+    """
+        Calculate the factor of an off-axis delta in one dimension.
+        f: the value of the location, v: the value of the delta,
+        limit: the (min, match, max) tuple for this dimension from getLimits.
+    """
+    mB, M, mA = limit
+    r = 0
+    if mA is not None and v > mA:
+        return 0
+    elif mB is not None and v < mB:
+        return 0
+    if f < v-_EPSILON:
+        if mB is None:
+            if M is not None and mA is not None:
+                if v == M:
+                    r = (float(max(f,mA)-min(f, mA))/float(max(M,mA)-min(M, mA)))
+                else:
+                    r = -(float(max(f,mA)-min(f, mA))/float(max(M,mA)-min(M, mA)) -1)
+            else: r = 0
+        elif mA is None: r = 0
+        else: r = float(f-mB)/(mA-mB)
+    elif f > v+_EPSILON:
+        if mB is None: r = 0
+        elif mA is None:
+            if M is not None and mB is not None:
+                if v == M:
+                    r = (float(max(f,mB)-min(f, mB))/(max(mB, M)-min(mB, M)))
+                else:
+                    r = -(float(max(f,mB)-min(f, mB))/(max(mB, M)-min(mB, M)) - 1)
+            else: r = 0
+        else: r = float(mA-f)/(mA-mB)
+    else: r = 1
+    return r
+
+
 def getLimits(locations, current, sortResults=True, verbose=False):
     """
         Find the projections for each delta in the list of locations, relative to the current location.
         Return only the dimensions that are relevant for current.
     """
     limit = {}
+    origin = FrozenLocation()
     for l in locations:
         a, b = current.common(l)
         if a is None:
@@ -402,11 +1896,11 @@ def getLimits(locations, current, sortResults=True, verbose=False):
                 limit[name]['='] = {}
                 limit[name]['>'] = {}
                 if f > 0:
-                    limit[name]['>'] = {0: [Location()]}
+                    limit[name]['>'] = {0: [origin]}
                 elif f<0:
-                    limit[name]['<'] = {0: [Location()]}
+                    limit[name]['<'] = {0: [origin]}
                 else:
-                    limit[name]['='] = {0: [Location()]}
+                    limit[name]['='] = {0: [origin]}
             if current[name] < value - _EPSILON:
                 if value not in limit[name]["<"]:
                     limit[name]["<"][value] = []
@@ -0,0 +1,55 @@
+from mutatorMath.objects.error import MutatorError
+from mutatorMath.objects.location import Location, LocationArray
+from mutatorMath.objects.bender import Bender
+
+
+def test_bendMany():
+    """
+    bendMany bends all locations in a LocationArray, the same as
+    calling the bender for each location.
+    >>> axes = {
+    ...     'aaaa': {'map': [(0, 100), (500, 200), (600, 600)], 'name': 'aaaaAxis', 'tag': 'aaaa', 'minimum': 0, 'maximum': 600, 'default': 0},
+    ...     'bbbb': {'map': [(500, 200)], 'name': 'bbbbAxis', 'tag': 'bbbb', 'minimum': 0, 'maximum': 600, 'default': 0},
+    ...     }
+    >>> b = Bender(axes)
+    >>> locations = [
+    ...     Location(aaaa=0, bbbb=250),
+    ...     Location(aaaa=250),
+    ...     Location(aaaa=(100, 200), bbbb=600),
+    ...     Location(aaaa=1000, bbbb=(250, 750)),
+    ...     Location(cccc=10),
+    ... ]
+    >>> bent = b.bendMany(LocationArray(locations)).toLocations()
+    >>> for loc in bent:
+    ...     print(loc)
+    <Location aaaa:100, bbbb:100 >
+    <Location aaaa:150 >
+    <Location aaaa:(120.000,140.000), bbbb:600 >
+    <Location aaaa:2200, bbbb:(100.000,1200.000) >
+    <Location cccc:10 >
+    >>> bent == [b(loc) for loc in locations]
+    True
+
+    Warp functions get one value or one split tuple at a time.
+    >>> def warpFunc(value):
+    ...     if isinstance(value, tuple):
+    ...         return value[0]*2, value[1]*2
+    ...     return value * 2
+    >>> b = Bender({'aaaa': {'map': warpFunc, 'name': 'aaaaAxis', 'tag': 'aaaa', 'minimum': 0, 'maximum': 600, 'default': 0}})
+    >>> b.bendMany(LocationArray(locations[1:3])).toLocations()
+    [<Location aaaa:500 >, <Location aaaa:(200.000,400.000), bbbb:600 >]
+    >>> def brokenWarpFunc(value):
+    ...     return value / 0
+    >>> b = Bender({'aaaa': {'map': brokenWarpFunc, 'name': 'aaaaAxis', 'tag': 'aaaa', 'minimum': 0, 'maximum': 600, 'default': 0}})
+    >>> try:
+    ...     b.bendMany(LocationArray(locations[:1]))
+    ... except MutatorError as e:
+    ...     print('(for axis "aaaa")' in e.msg)
+    True
+    """
+
+
+if __name__ == "__main__":
+    import sys
+    import doctest
+    sys.exit(doctest.testmod().failed)
@@ -1,4 +1,5 @@
-from mutatorMath.objects.location import Location, biasFromLocations, sortLocations
+from mutatorMath.objects.error import MutatorError
+from mutatorMath.objects.location import Location, FrozenLocation, AxisRegistry, ArrayLocation, LocationArray, LocationTree, locationsToBytes, locationsFromBytes, biasFromLocations, sortLocations
 
 
 def _testBiasFromLocations(bias, locs):
@@ -516,6 +517,240 @@ def test17():
     (<Location plop:0, pop:0.250, snap:1 >, <Location plop:0, pop:4, snap:1 >)
     """
 
+def test_frozenLocation():
+    """ FrozenLocation is an immutable, interned Location.
+
+    >>> a = FrozenLocation(pop=1, snap=(1, 2))
+    >>> a is FrozenLocation(Location(snap=(1, 2), pop=1))
+    True
+    >>> a.isAmbivalent(), a.isAmbivalent('pop'), a.isOnAxis(), a.isOrigin()
+    (True, False, False, False)
+    >>> FrozenLocation().isOrigin(), FrozenLocation(pop=0).isOnAxis() is None
+    (True, True)
+
+    Equal values are equal keys, but interning keeps the value types.
+    >>> FrozenLocation(pop=1) == FrozenLocation(pop=1.0)
+    True
+    >>> FrozenLocation(pop=1) is FrozenLocation(pop=1.0)
+    False
+    >>> len(set([FrozenLocation(pop=1), FrozenLocation(pop=1.0), FrozenLocation(pop=2)]))
+    2
+
+    >>> a.update(pop=2)
+    Traceback (most recent call last):
+        ...
+    TypeError: FrozenLocation can not be changed.
+    >>> a.expand(['crackle'])
+    Traceback (most recent call last):
+        ...
+    TypeError: FrozenLocation can not be changed.
+    >>> a * 2
+    <Location pop:2, snap:(2.000,4.000) >
+    >>> a.split()
+    (<Location pop:1, snap:1 >, <Location pop:1, snap:2 >)
+
+    >>> import copy, pickle
+    >>> pickle.loads(pickle.dumps(a)) is a, copy.deepcopy(a) is a
+    (True, True)
+
+    >>> from mutatorMath.objects.mutator import buildMutator
+    >>> bias, m = buildMutator([(Location(pop=0), 0), (Location(pop=1), 100)])
+    >>> m.makeInstance(FrozenLocation(pop=0.5))
+    50.0
+    """
+
+def test_arrayLocation():
+    """ ArrayLocation keeps the values of a location in the order of an AxisRegistry.
+
+    >>> registry = AxisRegistry()
+    >>> a = registry.fromLocation(Location(wt=(100, 200), wd=0))
+    >>> b = registry.fromLocation(Location(wt=100, opsz=12))
+    >>> registry.names
+    ['wd', 'wt', 'opsz']
+    >>> len(a.x), len(b.x)
+    (2, 3)
+
+    Locations made before an axis was added work with the newer ones.
+    >>> a + b
+    <ArrayLocation opsz:12, wd:0, wt:(200.000,300.000) >
+    >>> a - Location(wt=100)
+    <ArrayLocation wd:0, wt:(0.000,100.000) >
+    >>> (a - Location(wt=(100, 200))).isOrigin()
+    True
+    >>> a == Location(wt=(100, 200), wd=0), a == b, a.copy() == a
+    (True, False, True)
+    >>> a / (1, 2)
+    <ArrayLocation wd:0, wt:(150.000,300.000) >
+    >>> Location(wt=(100, 200), wd=0) / (1, 2)
+    <Location wd:0, wt:(150.000,300.000) >
+
+    >>> a.isAmbivalent(), a.isAmbivalent('wd'), b.isOnAxis(), b.getActiveAxes()
+    (True, False, False, ['opsz', 'wt'])
+    >>> b.common(Location(wt=200))
+    (<ArrayLocation wt:100 >, <ArrayLocation wt:200 >)
+    >>> b.distance(Location(wt=103, opsz=8))
+    5.0
+    >>> c = b.copy()
+    >>> c.expand(['wd', 'slnt'])
+    >>> c
+    <ArrayLocation opsz:12, slnt:0, wd:0, wt:100 >
+
+    Locations with different registries can not be combined.
+    >>> try:
+    ...     a + ArrayLocation(Location(wt=1))
+    ... except MutatorError as e:
+    ...     print(e.msg)
+    Can not combine locations with different axis registries.
+
+    A mutator takes an ArrayLocation like any other location.
+    >>> from mutatorMath.objects.mutator import buildMutator
+    >>> bias, m = buildMutator([(Location(wt=100), 0), (Location(wt=200), 100)])
+    >>> m.makeInstance(registry.fromLocation(Location(wt=150)))
+    50.0
+    """
+
+def test_locationArray():
+    """ LocationArray has many locations in one array, a row per location.
+
+    >>> registry = AxisRegistry(['wt', 'wd'])
+    >>> locations = [Location(wt=100), Location(wt=(100, 200), wd=50), Location(wd=0)]
+    >>> array = LocationArray(locations, registry)
+    >>> array.x.tolist()
+    [[100.0, nan], [100.0, 50.0], [nan, 0.0]]
+    >>> array.toLocations() == locations
+    True
+    >>> array[1:].toLocations()
+    [<Location wd:50, wt:(100.000,200.000) >, <Location wd:0 >]
+
+    The math is the same as with Location, one location at a time.
+    >>> (array - Location(wt=100)).toLocations() == [l - Location(wt=100) for l in locations]
+    True
+    >>> (array + array).toLocations() == [l + l for l in locations]
+    True
+    >>> import numpy
+    >>> (array * numpy.array([1, 2, 3])).toLocations()
+    [<Location wt:100 >, <Location wd:100, wt:(200.000,400.000) >, <Location wd:0 >]
+    >>> (array * (1, 2)).toLocations()
+    [<Location wt:(100.000,200.000) >, <Location wd:(50.000,100.000), wt:(100.000,400.000) >, <Location wd:(0.000,0.000) >]
+
+    >>> (array - Location(wt=100)).isOrigin().tolist()
+    [True, False, False]
+    >>> array.isOnAxis(), [l.isOnAxis() for l in locations]
+    (['wt', False, None], ['wt', False, None])
+    >>> array.getValues(['wd', 'opsz']).tolist()
+    [[0.0, 0.0], [50.0, 0.0], [0.0, 0.0]]
+
+    From an array with a column per axis.
+    >>> LocationArray.fromArray([[1, 2], [3, 4]], registry).toLocations()
+    [<Location wd:2, wt:1 >, <Location wd:4, wt:3 >]
+    """
+
+def test_biasCache():
+    """ The counts of the off-axis locations for each bias are the same
+    as comparing all pairs of locations.
+
+    >>> from mutatorMath.objects.location import _offAxisCounts, _biasCache
+    >>> locs = [
+    ...     Location(wt=1,     sz=0.4),
+    ...     Location(wt=0.275, sz=0.4),
+    ...     Location(wt=0,     sz=1),
+    ...     Location(wt=0.125, sz=0),
+    ...     Location(wt=0.125)]
+    >>> _offAxisCounts(locs)
+    [3, 3, 4, 3, 3]
+    >>> [[(l - bias).isOnAxis() for l in locs].count(False) for bias in locs]
+    [3, 3, 4, 3, 3]
+
+    Split values are compared in pairs.
+    >>> _offAxisCounts([Location(wt=(0, 1)), Location(wt=1)]) is None
+    True
+
+    The bias is kept for the same set of locations, in any order.
+    >>> _biasCache.clear()
+    >>> bias = biasFromLocations(locs)
+    >>> bias
+    <Location wt:0.125 >
+    >>> len(_biasCache)
+    1
+    >>> biasFromLocations([Location(l) for l in reversed(locs)])
+    <Location wt:0.125 >
+    >>> len(_biasCache)
+    1
+    """
+
+def test_locationTree():
+    """ LocationTree finds the nearest masters without comparing all of them.
+
+    >>> masters = [Location(wt=wt, wd=wd) for wt in range(0, 1001, 100) for wd in range(0, 501, 100)]
+    >>> tree = LocationTree(masters)
+    >>> len(tree)
+    66
+    >>> instance = Location(wt=420, wd=180)
+    >>> distance, index = tree.getNearest(instance)[0]
+    >>> masters[index], distance == masters[index].distance(instance)
+    (<Location wd:200, wt:400 >, True)
+
+    The enclosing masters.
+    >>> [masters[index] for distance, index in tree.getNearest(instance, 4)]
+    [<Location wd:200, wt:400 >, <Location wd:100, wt:400 >, <Location wd:200, wt:500 >, <Location wd:100, wt:500 >]
+    >>> tree.getNearest(instance, 0)
+    []
+    >>> len(tree.getNearest(instance, 100))
+    66
+
+    Axes that are not in the tree are zero for the masters.
+    >>> tree.getNearest(Location(wt=400, wd=200, opsz=3))
+    [(3.0, 26)]
+
+    >>> [masters[index] for index in tree.getInBox(Location(wt=350, wd=150), Location(wt=500, wd=250))]
+    [<Location wd:200, wt:400 >, <Location wd:200, wt:500 >]
+    >>> len(tree.getInBox(Location(wt=1000), Location()))
+    6
+    >>> tree.getInBox(Location(opsz=1), Location())
+    []
+
+    From a LocationArray.
+    >>> tree = LocationTree(LocationArray(masters))
+    >>> tree.getNearest(instance)[0][1] == index
+    True
+    >>> try:
+    ...     LocationTree([Location(wt=(0, 1))])
+    ... except MutatorError as e:
+    ...     print(e.msg)
+    LocationTree can not use split locations.
+    """
+
+def test_bytes():
+    """ Locations packed in bytes, for caches and files.
+
+    >>> locations = [Location(wt=100), Location(wt=(100, 200), wd=50.25), Location(), Location(wd=-0.5)]
+    >>> data = locationsToBytes(locations)
+    >>> len(data)
+    122
+    >>> locationsFromBytes(data) == locations
+    True
+    >>> locationsFromBytes(locationsToBytes(LocationArray(locations))) == locations
+    True
+    >>> locationsFromBytes(locationsToBytes([]))
+    []
+
+    One location.
+    >>> l = Location()
+    >>> l.fromBytes(Location(wt=(1, 2)).toBytes())
+    >>> l
+    <Location wt:(1.000,2.000) >
+    >>> try:
+    ...     l.fromBytes(data)
+    ... except MutatorError as e:
+    ...     print(e.msg)
+    The data has 4 locations, not 1.
+    >>> try:
+    ...     locationsFromBytes(b"MUTM" + data[4:])
+    ... except MutatorError as e:
+    ...     print(e.msg)
+    Not location data.
+    """
+
 def regressionTests():
     """ Test all the basic math operations
     
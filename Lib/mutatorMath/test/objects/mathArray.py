@@ -0,0 +1,96 @@
+from mutatorMath.objects.error import MutatorError
+from mutatorMath.objects.location import Location
+from mutatorMath.objects.mutator import Mutator, buildMutator
+from mutatorMath.objects.mathArray import MathArray
+
+
+def test_math():
+    """
+    >>> a = MathArray([1, 2, 3])
+    >>> b = MathArray([10, 20, 30])
+    >>> a + b
+    <MathArray (3,) [11.0, 22.0, 33.0]>
+    >>> b - a
+    <MathArray (3,) [9.0, 18.0, 27.0]>
+    >>> 0.5 * a, a * 2
+    (<MathArray (3,) [0.5, 1.0, 1.5]>, <MathArray (3,) [2.0, 4.0, 6.0]>)
+    >>> b / 10
+    <MathArray (3,) [1.0, 2.0, 3.0]>
+    """
+
+
+def test_shape():
+    """
+    >>> a = MathArray(range(6), shape=(3, 2))
+    >>> a.shape, len(a)
+    ((3, 2), 3)
+    >>> a * (1, 0)
+    <MathArray (3, 2) [[0.0, 0.0], [2.0, 0.0], [4.0, 0.0]]>
+    >>> try:
+    ...     a + MathArray(range(6))
+    ... except MutatorError as e:
+    ...     print(e.msg)
+    Can not combine arrays of shape (3, 2) and (6,).
+    >>> try:
+    ...     MathArray(range(6)) * (1, 0)
+    ... except MutatorError as e:
+    ...     print(e.msg)
+    Can not scale an array of shape (6,) with (1, 0).
+    """
+
+
+def test_iaddScaled():
+    """
+    The scaled values are added in place, without new arrays.
+    >>> total = MathArray([1, 2, 3])
+    >>> values = total.values
+    >>> total._iaddScaled(MathArray([10, 20, 30]), 0.5)
+    >>> total._iaddScaled(MathArray([10, 20, 30]), 1)
+    >>> total
+    <MathArray (3,) [16.0, 32.0, 48.0]>
+    >>> total.values is values
+    True
+    """
+
+
+def test_mutator():
+    """
+    >>> items = [
+    ...     (Location(pop=0, snap=0), MathArray([0, 0, 0])),
+    ...     (Location(pop=1), MathArray([10, 20, 30])),
+    ...     (Location(snap=1), MathArray([100, 200, 300])),
+    ...     (Location(pop=1, snap=1), MathArray([200, 300, 400])),
+    ...     (Location(pop=2), MathArray([20, 40, 80])),
+    ... ]
+    >>> bias, m = buildMutator(items)
+    >>> m.makeInstance(Location(pop=0.5, snap=0.5))
+    <MathArray (3,) [77.5, 130.0, 182.5]>
+    >>> m.compile().makeInstance(Location(pop=1.5))
+    <MathArray (3,) [15.0, 30.0, 55.0]>
+    >>> bias, w = buildMutator(items, masterWeights=True)
+    >>> w.makeInstance(Location(pop=1.5))
+    <MathArray (3,) [15.0, 30.0, 55.0]>
+    >>> import pickle
+    >>> pickle.loads(pickle.dumps(m)).makeInstance(Location(pop=1.5))
+    <MathArray (3,) [15.0, 30.0, 55.0]>
+    """
+
+
+def test_pickle():
+    """
+    MathArray can be pickled with all protocols, also when empty, zero or 2-D.
+    >>> import pickle
+    >>> arrays = [MathArray([]), MathArray([0.0]), MathArray([1, 2, 3]), MathArray([[0, 0], [100, 10]])]
+    >>> for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+    ...     for a in arrays:
+    ...         b = pickle.loads(pickle.dumps(a, protocol))
+    ...         assert b.shape == a.shape and (b + a).values.tolist() == (a * 2).values.tolist()
+    >>> pickle.loads(pickle.dumps(MathArray([[0, 0], [100, 10]]), 0))
+    <MathArray (2, 2) [[0.0, 0.0], [100.0, 10.0]]>
+    """
+
+
+if __name__ == "__main__":
+    import sys
+    import doctest
+    sys.exit(doctest.testmod().failed)
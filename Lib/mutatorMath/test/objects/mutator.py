@@ -1,6 +1,6 @@
 from mutatorMath.objects.error import MutatorError
 from mutatorMath.objects.location import Location, sortLocations, biasFromLocations
-from mutatorMath.objects.mutator import Mutator, buildMutator, getLimits
+from mutatorMath.objects.mutator import Mutator, buildMutator, getLimits, _AxisIndex
 
 
 def test_singleAxis(n):
@@ -141,6 +141,28 @@ def test_getLimits(a, b, t):
     print(getLimits(locations, test))
 
 
+def test_axisIndex(t):
+    """Test the limits from the per-axis index.
+    >>> test_axisIndex(0)
+    {'pop': (None, 0, None)}
+    >>> test_axisIndex(0.5)
+    {'pop': (0, None, 1)}
+    >>> test_axisIndex(1.5)
+    {'pop': (1, None, 2)}
+    >>> test_axisIndex(3)
+    {'pop': (1, 2, None)}
+    >>> test_axisIndex(-1)
+    {'pop': (None, 0, 1)}
+
+    The index gives the same limits as getLimits.
+    >>> test_axisIndex(2.5) == getLimits([Location(pop=1), Location(pop=2)], Location(pop=2.5))
+    True
+    """
+    locations = [Location(), Location(pop=1), Location(pop=2)]
+    index = _AxisIndex([l.asTuple() for l in locations])
+    return index.getLimits(Location(pop=t))
+
+
 def test_methods():
     """ Test some of the methods.
     >>> m = test_methods()
@@ -212,7 +234,7 @@ def test_builderBender_1():
     >>> mb.makeInstance(Location(pop=7), bend=True)
     7.0
     >>> mb.makeInstance(Location(pop=8), bend=True)
-    7.999999999999999
+    8.0
     >>> mb.makeInstance(Location(pop=9), bend=True)
     9.0
     >>> mb.makeInstance(Location(pop=10), bend=True)
@@ -244,6 +266,21 @@ def test_builderBender_2():
     """
 
 
+def test_sharedBender():
+    """ Mutators of one designspace can share one Bender.
+
+    >>> from mutatorMath.objects.bender import Bender
+    >>> axisdict = dict(pop = dict(name='pop', minimum=0, maximum=10, default=0, map=[(0,0), (5, 2), (10,10)]))
+    >>> bender = Bender(axisdict)
+    >>> bias, ma = buildMutator([(Location(pop=0), 0), (Location(pop=10), 10)], bender=bender)
+    >>> bias, mb = buildMutator([(Location(pop=0), 0), (Location(pop=10), 100)], axisdict, bender=bender)
+    >>> ma._bender is bender, mb._bender is bender
+    (True, True)
+    >>> ma.makeInstance(Location(pop=5), bend=True), mb.makeInstance(Location(pop=5), bend=True)
+    (2.0, 20.0)
+    """
+
+
 def test_builderBender_3():
     """
     Test case from
@@ -270,6 +307,602 @@ def test_builderBender_3():
     """
 
 
+def test_compile():
+    """ Test the compiled mutator.
+    A compiled mutator calculates the same instances.
+
+    >>> items = [
+    ...    (Location(pop=1, snap=1), 1),
+    ...    (Location(pop=2, snap=1), 2),
+    ...    (Location(pop=3, snap=1), 3),
+    ...    (Location(pop=1, snap=2), 4),
+    ...    (Location(pop=2, snap=2), 5),
+    ...    (Location(pop=3, snap=2), 6),
+    ...    (Location(pop=2, snap=3), 8),
+    ... ]
+    >>> locations = [Location(pop=p*0.5, snap=s*0.5) for p in range(-2, 9) for s in range(-2, 9)]
+    >>> bias, mb = buildMutator(items)
+    >>> expected = [mb.makeInstance(l) for l in locations]
+    >>> mb.isCompiled()
+    False
+    >>> mb.compile().isCompiled()
+    True
+    >>> [mb.makeInstance(l) for l in locations] == expected
+    True
+
+    The location is not changed by the compiled mutator.
+    >>> l = Location(pop=1)
+    >>> mb.getInstance(l)
+    1
+    >>> l
+    <Location pop:1 >
+
+    Adding a delta discards the compiled plan.
+    >>> mb.addDelta(Location(pop=3, snap=3), 2, punch=True)
+    >>> mb.isCompiled()
+    False
+
+    A frozen mutator does not accept new deltas.
+    >>> mb.freeze().isFrozen()
+    True
+    >>> try:
+    ...     mb.addDelta(Location(pop=4), 0)
+    ... except MutatorError as e:
+    ...     print(e.msg)
+    Can not add a delta to a frozen mutator.
+    """
+
+
+def test_builderPunch():
+    """ The builder punches all off-axis deltas in one pass.
+    The deltas are the same as punching them one by one.
+
+    >>> items = [
+    ...    (Location(pop=0, snap=0), 0),
+    ...    (Location(pop=1, snap=0), 10),
+    ...    (Location(pop=2, snap=0), 30),
+    ...    (Location(pop=0, snap=1), 5),
+    ...    (Location(pop=1, snap=1), 20),
+    ...    (Location(pop=2, snap=1), 50),
+    ...    (Location(pop=0.5, crackle=1), 7),
+    ...    (Location(crackle=1), 1),
+    ... ]
+    >>> bias, mb = buildMutator(items)
+    >>> m = Mutator()
+    >>> m.setNeutral(0)
+    >>> relative = [(loc-bias, obj) for loc, obj in sorted(items)]
+    >>> onAxis = [(loc, obj) for loc, obj in relative if loc.isOnAxis()]
+    >>> offAxis = [(loc, obj) for loc, obj in relative if loc.isOnAxis() is False]
+    >>> for loc, obj in onAxis:
+    ...     m.addDelta(loc, obj, punch=False)
+    >>> for loc, obj in offAxis:
+    ...     m.addDelta(loc, obj, punch=True)
+    >>> sorted(m.items()) == sorted(mb.items())
+    True
+    >>> mb.makeInstance(Location(pop=1.5, snap=0.5))
+    27.5
+    """
+
+
+def test_supportPruning():
+    """ A compiled mutator only calculates the deltas that can contribute.
+    The factors are the same as the non-zero factors of all deltas.
+
+    >>> items = []
+    >>> for pop in range(8):
+    ...     for snap in range(5):
+    ...         items.append((Location(pop=pop, snap=snap), pop*snap+pop))
+    >>> bias, mb = buildMutator(items)
+    >>> len(mb)
+    40
+    >>> mb.compile().isCompiled()
+    True
+    >>> location = Location(pop=2.5, snap=3.25)
+    >>> factors = mb.getFactors(location)
+    >>> len(factors)
+    9
+    >>> allFactors = mb.getFactors(location, allFactors=True)
+    >>> len(allFactors)
+    40
+    >>> factors == [f for f in allFactors if f[0] != 0]
+    True
+    >>> mb.makeInstance(location)
+    10.625
+    """
+
+
+def test_grid():
+    """ Masters on a full grid are interpolated cell by cell.
+    The instances are the same as with the deltas.
+
+    >>> items = []
+    >>> for pop in [0, 1, 3]:
+    ...     for snap in [-1, 0, 2]:
+    ...         items.append((Location(pop=pop, snap=snap), pop*snap+pop-snap))
+    >>> bias, mb = buildMutator(items, grid=True)
+    >>> mb.isGrid()
+    True
+    >>> locations = [Location(pop=p*0.5, snap=s*0.5) for p in range(-2, 9) for s in range(-4, 7)]
+    >>> grid = [mb.makeInstance(l) for l in locations]
+    >>> mb._grid = None
+    >>> deltas = [mb.makeInstance(l) for l in locations]
+    >>> max([abs(a-b) for a, b in zip(grid, deltas)]) < 1e-12
+    True
+
+    A grid with a missing master uses the deltas.
+    >>> bias, mb = buildMutator(items[:-1], grid=True)
+    >>> mb.isGrid()
+    False
+    """
+
+
+def test_masterWeights():
+    """ The weights of the masters at a location.
+
+    >>> items = [
+    ...    (Location(pop=0, snap=0), 0),
+    ...    (Location(pop=1, snap=0), 10),
+    ...    (Location(pop=0, snap=1), 20),
+    ...    (Location(pop=1, snap=1), 50),
+    ...    (Location(pop=2, snap=2), 100),
+    ... ]
+    >>> bias, mb = buildMutator(items)
+    >>> weights = mb.getMasterWeights(Location(pop=0.5, snap=0.5))
+    >>> weights
+    [0.25, 0.25, 0.25, 0.25, 0.0]
+    >>> sum([w * obj for w, (loc, obj) in zip(weights, items)])
+    20.0
+    >>> mb.makeInstance(Location(pop=0.5, snap=0.5))
+    20.0
+    >>> mb.getMasterWeights(Location(pop=(0, 1)))
+    [(1, 0), (0, 1), (0, 0), (0, 0), (0, 0)]
+
+    A mutator that adds up the weighted masters, no deltas are calculated.
+    >>> bias, mw = buildMutator(items, masterWeights=True)
+    >>> len(mw)
+    0
+    >>> mw.getNeutral()
+    0
+    >>> mw.makeInstance(Location(pop=0.5, snap=0.5))
+    20.0
+    >>> mw.makeInstance(Location(pop=1.5, snap=1.5)) == mb.makeInstance(Location(pop=1.5, snap=1.5))
+    True
+    """
+
+
+def test_factorMatrix():
+    """
+    The factors of all deltas for many locations at once.
+    One row per location, one column per delta in the order of sorted(m.items()).
+    >>> import numpy
+    >>> items = [
+    ...    (Location(pop=0, snap=0), 0),
+    ...    (Location(pop=1, snap=0), 10),
+    ...    (Location(pop=0, snap=1), 20),
+    ...    (Location(pop=1, snap=1), 50),
+    ... ]
+    >>> bias, m = buildMutator(items)
+    >>> [loc for loc, obj in sorted(m.items())]
+    [(), (('pop', 0), ('snap', 1)), (('pop', 1), ('snap', 0)), (('pop', 1), ('snap', 1))]
+    >>> locations = [Location(pop=0.5, snap=0.5), Location(pop=1), Location(pop=2, snap=0.5)]
+    >>> f = m.getFactorMatrix(locations)
+    >>> f.tolist()
+    [[1.0, 0.5, 0.5, 0.25], [1.0, 0.0, 1.0, 0.0], [1.0, 0.5, 2.0, 1.0]]
+    >>> deltas = [mathItem for loc, (mathItem, deltaName) in sorted(m.items())]
+    >>> [float(m.getNeutral() + d) for d in numpy.dot(f, deltas)]
+    [20.0, 10.0, 50.0]
+    >>> [float(m.makeInstance(loc)) for loc in locations]
+    [20.0, 10.0, 50.0]
+    >>> m.getFactorMatrix(locations, axisOnly=True).tolist()
+    [[1.0, 0.5, 0.5, 0.0], [1.0, 0.0, 1.0, 0.0], [1.0, 0.5, 2.0, 0.0]]
+    >>> try:
+    ...     m.getFactorMatrix([Location(pop=(0, 1))])
+    ... except MutatorError as e:
+    ...     print(e.msg)
+    getFactorMatrix can not use ambivalent locations.
+
+    A LocationArray gives the same factors, and the same instances.
+    >>> from mutatorMath.objects.location import LocationArray
+    >>> array = LocationArray(locations)
+    >>> m.getFactorMatrix(array).tolist() == f.tolist()
+    True
+    >>> [float(instance) for instance in m.makeInstances(array)]
+    [20.0, 10.0, 50.0]
+    """
+
+
+def _popSnapItems(makeObject=None):
+    """
+    Five masters on the pop and snap axes, makeObject makes other math objects of the values.
+    """
+    items = [
+        (Location(pop=0), 0),
+        (Location(pop=1), 10),
+        (Location(pop=2), 40),
+        (Location(snap=1), 100),
+        (Location(pop=1, snap=1), 200),
+        ]
+    if makeObject is None:
+        return items
+    return [(loc, makeObject(value)) for loc, value in items]
+
+
+class _Point(object):
+    """
+    A math object with separate x and y values, counting how many are made.
+    With inPlace it has an _iaddScaled method to add up in place.
+    """
+    made = 0
+
+    def __init__(self, x, y, inPlace=False):
+        self.x = x
+        self.y = y
+        self.inPlace = inPlace
+        _Point.made += 1
+
+    def __repr__(self):
+        return "<_Point %s %s>" % (self.x, self.y)
+
+    def __add__(self, other):
+        return _Point(self.x + other.x, self.y + other.y, self.inPlace)
+
+    def __sub__(self, other):
+        return _Point(self.x - other.x, self.y - other.y, self.inPlace)
+
+    def __mul__(self, factor):
+        if isinstance(factor, tuple):
+            return _Point(self.x * factor[0], self.y * factor[1], self.inPlace)
+        return _Point(self.x * factor, self.y * factor, self.inPlace)
+
+    __rmul__ = __mul__
+
+    def __getattr__(self, name):
+        if name == "_iaddScaled" and self.__dict__.get("inPlace"):
+            return self.iaddScaled
+        raise AttributeError(name)
+
+    def iaddScaled(self, other, factor):
+        self.x += factor * other.x
+        self.y += factor * other.y
+
+
+def test_makeInstances():
+    """
+    Calculate the instances for many locations, in the same order.
+    >>> bias, m = buildMutator(_popSnapItems())
+    >>> locations = [Location(pop=0.5), dict(pop=1.5, snap=0.5), Location(pop=0.5), Location(pop=2, snap=1)]
+    >>> instances = m.makeInstances(locations)
+    >>> next(instances)
+    5.0
+    >>> list(instances)
+    [137.5, 5.0, 300.0]
+    >>> [m.makeInstance(loc) for loc in locations]
+    [5.0, 137.5, 5.0, 300.0]
+    >>> list(m.makeInstances([]))
+    []
+
+    A repeated location gets a new instance, so it can be changed in place.
+    >>> bias, m = buildMutator(_popSnapItems(lambda v: _Point(v, v, True)))
+    >>> instances = list(m.makeInstances([Location(pop=0.5), Location(pop=0.5)]))
+    >>> instances[0] is instances[1]
+    False
+    >>> instances[0].iaddScaled(instances[0], 1)
+    >>> [instance.x for instance in instances]
+    [10.0, 5.0]
+
+    Only the factors of the recent locations are kept, a long stream of
+    locations does not keep them all.
+    >>> locations = [Location(pop=(i % 200)*0.01) for i in range(1000)]
+    >>> [instance.x for instance in m.makeInstances(locations)][::250]
+    [0, 5.0, 10, 25.0]
+    >>> [i.x for i in m.makeInstances(locations)] == [m.makeInstance(loc).x for loc in locations]
+    True
+    """
+
+
+def test_iaddScaled(inPlace):
+    """
+    Math objects with an _iaddScaled(other, factor) method are added up in place.
+    >>> test_iaddScaled(False)
+    (150.0, 4)
+    >>> test_iaddScaled(True)
+    (150.0, 1)
+    """
+    bias, m = buildMutator(_popSnapItems(lambda v: _Point(v, v, inPlace)))
+    m.compile()
+    _Point.made = 0
+    instance = m.makeInstance(Location(pop=0.5, snap=1))
+    return instance.x, _Point.made
+
+
+def test_sideEffects():
+    """
+    Calculating instances changes neither the location nor the mutator,
+    so one mutator can be used from several threads.
+    >>> import threading
+    >>> bias, m = buildMutator(_popSnapItems())
+    >>> keys = sorted(m.keys())
+    >>> loc = Location(pop=1.5)
+    >>> m.getFactors(loc)[0][0]
+    1
+    >>> loc
+    <Location pop:1.500 >
+    >>> m.getInstance(loc)
+    150.0
+    >>> loc
+    <Location pop:1.500 >
+    >>> m._axes is None
+    True
+    >>> sorted(m.keys()) == keys
+    True
+    >>> locations = [Location(pop=0.1*i, snap=0.05*i) for i in range(40)]
+    >>> expected = [m.makeInstance(l) for l in locations]
+    >>> results = []
+    >>> def work():
+    ...     results.append([m.makeInstance(l) for l in locations])
+    >>> threads = [threading.Thread(target=work) for i in range(8)]
+    >>> for t in threads: t.start()
+    >>> for t in threads: t.join()
+    >>> results == [expected]*8
+    True
+    """
+
+
+def test_factorCache():
+    """
+    An optional cache for the factors of recent locations.
+    >>> bias, m = buildMutator(_popSnapItems())
+    >>> m.getFactorCacheInfo() is None
+    True
+    >>> m.setFactorCache(2)
+    >>> m.makeInstance(Location(pop=0.5))
+    5.0
+    >>> m.makeInstance(Location(pop=0.5))
+    5.0
+    >>> m.makeInstance(Location(pop=0.5+1e-9))
+    5.0
+    >>> sorted(m.getFactorCacheInfo().items())
+    [('hits', 2), ('maxSize', 2), ('misses', 1), ('size', 1)]
+    >>> m.makeInstance(Location(pop=1.5))
+    25.0
+    >>> m.makeInstance(Location(pop=1.5, snap=0.5))
+    137.5
+    >>> m.makeInstance(Location(pop=0.5))
+    5.0
+    >>> sorted(m.getFactorCacheInfo().items())
+    [('hits', 2), ('maxSize', 2), ('misses', 4), ('size', 2)]
+
+    Locations in design units that are nearly the same share the factors too.
+    >>> m.setFactorCache(2)
+    >>> [m.makeInstance(Location(pop=loc)) for loc in (500, 500+1e-12, 500.0000000001)]
+    [14980.0, 14980.0, 14980.0]
+    >>> m.getFactorCacheInfo()['misses']
+    1
+    >>> m.setFactorCache(2, quantum=0.25)
+    >>> m.makeInstance(Location(pop=0.5)), m.makeInstance(Location(pop=0.55))
+    (5.0, 5.0)
+    >>> m.makeInstance(Location(pop=1e305)) > 1e306
+    True
+    >>> try:
+    ...     m.setFactorCache(2, quantum=0)
+    ... except MutatorError as e:
+    ...     print(e.msg)
+    The factor cache needs a quantum of more than 0.
+
+    The cache is emptied when a delta is added.
+    >>> m.addDelta(Location(pop=3), 100)
+    >>> m.getFactorCacheInfo()['size']
+    0
+    >>> m.setFactorCache(None)
+    >>> m.getFactorCacheInfo() is None
+    True
+    """
+
+
+def test_anisotropic():
+    """
+    An ambivalent location has different values for x and y.
+    The x and y factors are added up in one result.
+    >>> items = _popSnapItems(lambda v: _Point(v, v))
+    >>> bias, m = buildMutator(items)
+    >>> m.makeInstance(Location(pop=0.5))
+    <_Point 5.0 5.0>
+    >>> m.makeInstance(Location(pop=1.5, snap=0.5))
+    <_Point 137.5 137.5>
+    >>> _Point.made = 0
+    >>> m.makeInstance(Location(pop=(0.5, 1.5), snap=(0, 0.5)))
+    <_Point 5.0 137.5>
+    >>> _Point.made
+    10
+
+    Same with the masters on a grid.
+    >>> items.append((Location(pop=2, snap=1), _Point(300, 300)))
+    >>> bias, m = buildMutator(items, grid=True)
+    >>> m.isGrid()
+    True
+    >>> m.makeInstance(Location(pop=(0.5, 1.5), snap=(0, 0.5)))
+    <_Point 5.0 137.5>
+    """
+
+
+def test_updateMaster():
+    """
+    Replace one master, only the deltas that depend on it are calculated again.
+    >>> items = [
+    ...    (Location(pop=0, snap=0), 0),
+    ...    (Location(pop=1), 10),
+    ...    (Location(pop=2), 40),
+    ...    (Location(snap=1), 100),
+    ...    (Location(snap=2), 150),
+    ...    (Location(pop=1, snap=1), 200),
+    ... ]
+    >>> bias, m = buildMutator(items, bias=Location(pop=0, snap=0))
+    >>> m.makeInstance(Location(pop=0.5, snap=0.5))
+    77.5
+    >>> before = dict(m)
+    >>> m.updateMaster(Location(pop=2), 60)
+    >>> [key for key in sorted(m.keys()) if m[key] != before[key]]
+    [(('pop', 2), ('snap', 0))]
+    >>> before = dict(m)
+    >>> m.updateMaster(Location(pop=1), 20)
+    >>> [key for key in sorted(m.keys()) if m[key] != before[key]]
+    [(('pop', 1), ('snap', 0)), (('pop', 1), ('snap', 1))]
+    >>> items[1] = (Location(pop=1), 20)
+    >>> items[2] = (Location(pop=2), 60)
+    >>> bias, rebuilt = buildMutator(items, bias=Location(pop=0, snap=0))
+    >>> dict(m) == dict(rebuilt)
+    True
+    >>> m.makeInstance(Location(pop=0.5, snap=0.5))
+    80.0
+    >>> m.updateMaster(dict(pop=1, snap=1), 300)
+    >>> m.makeInstance(Location(pop=0.5, snap=0.5))
+    105.0
+    >>> m.updateMaster(Location(pop=0, snap=0), 10)
+    >>> m.getNeutral()
+    10
+    >>> m.makeInstance(Location(pop=0.5, snap=0.5))
+    107.5
+    >>> try:
+    ...     m.updateMaster(Location(pop=3), 10)
+    ... except MutatorError as e:
+    ...     print(e.msg)
+    There is no master at this location.
+    """
+
+def test_serialize():
+    """
+    Mutators can be pickled and saved to a file, they are ready to use when loaded.
+    >>> import os, pickle, tempfile
+    >>> from mutatorMath.objects.mutator import saveMutators, loadMutators
+    >>> items = _popSnapItems()
+    >>> bias, m = buildMutator(items)
+    >>> m.compile().isCompiled()
+    True
+    >>> copy = pickle.loads(pickle.dumps(m))
+    >>> dict(copy) == dict(m), copy.getBias() == bias, copy.isCompiled()
+    (True, True, True)
+    >>> copy.makeInstance(Location(pop=1.5, snap=0.5))
+    137.5
+    >>> bias, grid = buildMutator(items[:2], grid=True)
+    >>> path = os.path.join(tempfile.mkdtemp(), "mutators.bin")
+    >>> saveMutators(path, {"a": m, "b": grid})
+    >>> mutators = loadMutators(path)
+    >>> len(mutators), sorted(mutators.keys()), "c" in mutators
+    (2, ['a', 'b'], False)
+    >>> mutators["a"].makeInstance(Location(pop=1.5, snap=0.5))
+    137.5
+    >>> mutators["b"].isGrid(), mutators["b"].makeInstance(Location(pop=0.5))
+    (True, 5.0)
+    >>> mutators.close()
+
+    A bender that is shared by mutators is still shared when they are loaded.
+    >>> from mutatorMath.objects.bender import Bender
+    >>> bender = Bender(dict(pop=dict(name='pop', minimum=0, maximum=2, default=0, map=[(0, 0), (1, 2), (2, 2)], tag='pop')))
+    >>> bias, ma = buildMutator(items, bender=bender)
+    >>> bias, mb = buildMutator(items[:3], bender=bender)
+    >>> saveMutators(path, {"a": ma, "b": mb})
+    >>> mutators = loadMutators(path)
+    >>> mutators["a"]._bender is mutators["b"]._bender
+    True
+    >>> mutators["a"].makeInstance(Location(pop=0.25), bend=True)
+    5.0
+    >>> mutators.close()
+
+    The file can only refer to the classes that mutators need, other
+    classes of math objects are given to loadMutators.
+    >>> bias, points = buildMutator(_popSnapItems(lambda v: _Point(v, v)))
+    >>> saveMutators(path, {"points": points})
+    >>> mutators = loadMutators(path)
+    >>> try:
+    ...     mutators["points"]
+    ... except MutatorError as e:
+    ...     print(e.msg.replace(_Point.__module__, "test"))
+    A mutator file can not refer to test._Point.
+    >>> mutators.close()
+    >>> mutators = loadMutators(path, classes=[_Point])
+    >>> mutators["points"].makeInstance(Location(pop=0.5))
+    <_Point 5.0 5.0>
+    >>> mutators.close()
+    >>> os.remove(path)
+    """
+
+
+def test_sparseAxes():
+    """
+    A compiled mutator only visits the axes where the location is not zero.
+    An off-axis delta that is not zero on another axis does not count.
+    >>> m = Mutator()
+    >>> m.setNeutral(0)
+    >>> for name in "abcdefgh":
+    ...     m.addDelta(Location(**{name: 1}), 10)
+    >>> m.addDelta(Location(a=1, b=1), 1)
+    >>> m.addDelta(Location(a=1, c=1), 2)
+    >>> m.addDelta(Location(b=1, h=1), 3)
+    >>> loc = Location(a=0.5, b=0.5)
+    >>> factors = m.getFactors(loc)
+    >>> factors
+    [(1, 0, 'origin'), (0.5, 10, None), (0.5, 10, None), (0.25, 1, None)]
+    >>> m.compile().getFactors(loc) == factors
+    True
+    >>> m.getInstance(loc)
+    10.25
+    >>> m.getInstance(Location(a=0.5, b=0.5, c=0.5, h=0.5))
+    20.375
+    """
+
+
+def test_deltaView():
+    """
+    The deltas are read like a dictionary, they are only added with addDelta.
+    >>> m = Mutator()
+    >>> m.setNeutral(0)
+    >>> m.addDelta(Location(pop=1), 10, "pop")
+    >>> m.addDelta(Location(pop=1, snap=1), 5)
+    >>> len(m), (('pop', 1),) in m
+    (3, True)
+    >>> m[(('pop', 1),)]
+    (10, 'pop')
+    >>> sorted(m.items())
+    [((), (0, 'origin')), ((('pop', 1),), (10, 'pop')), ((('pop', 1), ('snap', 1)), (5, None))]
+    >>> m.get((('snap', 1),)) is None
+    True
+    >>> m.addDelta(Location(pop=1), 20, "pop")
+    >>> m[(('pop', 1),)], len(m)
+    ((20, 'pop'), 3)
+    >>> try:
+    ...     m[(('snap', 1),)] = 1, None
+    ... except TypeError:
+    ...     print("read only")
+    read only
+    >>> m == dict(m.items())
+    True
+
+    Equal location tuples of different mutators are the same object.
+    >>> other = Mutator()
+    >>> other.addDelta(Location(pop=1), 10)
+    >>> other.keys()[0] is m.keys()[1]
+    True
+
+    The keys stay interned only as long as a mutator uses them.
+    >>> import gc
+    >>> from mutatorMath.objects import mutator
+    >>> before = len(mutator._internedKeys)
+    >>> for i in range(100):
+    ...     bias, m = buildMutator([(Location(pop=0), 0), (Location(pop=1+i), 10)])
+    >>> del m
+    >>> _ = gc.collect()
+    >>> len(mutator._internedKeys) <= before
+    True
+
+    Looking up a key does not compare all keys.
+    >>> m = Mutator()
+    >>> for i in range(1000):
+    ...     m.addDelta(Location(pop=i), i)
+    >>> m[(('pop', 999),)], m.get((('pop', 1000),), "none")
+    ((999, None), 'none')
+    """
+
+
 if __name__ == "__main__":
     import sys
     import doctest
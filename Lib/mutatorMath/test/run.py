@@ -18,11 +18,20 @@ import doctest
 
 import mutatorMath
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, HERE)
 try:
     import test.objects.mutator
     import test.objects.location
+    if numpy is not None:
+        import mutatorMath.objects.mathArray
+        import test.objects.mathArray
+        import test.objects.bender
     import test.ufo.test
     import test.ufo.geometryTest
     import test.ufo.kerningTest
@@ -31,14 +40,44 @@ finally:
     sys.path.remove(HERE)
 
 
+# doctests that need numpy, they are skipped without it
+NUMPY_TESTS = [
+    'mutatorMath.objects.location.AxisRegistry',
+    'mutatorMath.objects.location.ArrayLocation',
+    'mutatorMath.objects.location.LocationArray',
+    'test.objects.location.test_arrayLocation',
+    'test.objects.location.test_locationArray',
+    'test.objects.location.test_locationTree',
+    'test.objects.location.test_bytes',
+    'test.objects.mutator.test_factorMatrix',
+    ]
+
+
+class NumpyTestFinder(doctest.DocTestFinder):
+
+    """ Find the doctests, without the ones that need numpy if it is missing. """
+
+    def find(self, *args, **kwargs):
+        tests = doctest.DocTestFinder.find(self, *args, **kwargs)
+        if numpy is not None:
+            return tests
+        return [t for t in tests if not [n for n in NUMPY_TESTS if t.name == n or t.name.startswith(n + '.')]]
+
+
 def load_tests(loader, tests, ignore):
+    finder = NumpyTestFinder()
     # doctests inline in the actual Location and Mutator objects comments
-    tests.addTests(doctest.DocTestSuite(mutatorMath.objects.location))
-    tests.addTests(doctest.DocTestSuite(mutatorMath.objects.mutator))
+    tests.addTests(doctest.DocTestSuite(mutatorMath.objects.location, test_finder=finder))
+    tests.addTests(doctest.DocTestSuite(mutatorMath.objects.mutator, test_finder=finder))
+    if numpy is not None:
+        tests.addTests(doctest.DocTestSuite(mutatorMath.objects.mathArray))
 
     # standalone Location and Mutator doctests
-    tests.addTests(doctest.DocTestSuite(test.objects.mutator))
-    tests.addTests(doctest.DocTestSuite(test.objects.location))
+    tests.addTests(doctest.DocTestSuite(test.objects.mutator, test_finder=finder))
+    tests.addTests(doctest.DocTestSuite(test.objects.location, test_finder=finder))
+    if numpy is not None:
+        tests.addTests(doctest.DocTestSuite(test.objects.mathArray))
+        tests.addTests(doctest.DocTestSuite(test.objects.bender))
 
     # doctests in the test.ufo package
     tests.addTests(doctest.DocTestSuite(test.ufo.test))
@@ -1,12 +1,13 @@
 # -*- coding: utf-8 -*-
 from __future__ import print_function
 from defcon.objects.font import Font
-from fontMath import MathKerning
+from fontMath import MathKerning, MathInfo, MathGlyph
 
 from fontMath.mathKerning import MathKerning
 
 from mutatorMath.ufo.document import DesignSpaceDocumentWriter, DesignSpaceDocumentReader
 from mutatorMath.objects.location import Location
+from mutatorMath.objects.mutator import buildMutator
 
 import os, sys, shutil
 
@@ -147,6 +148,76 @@ def test1():
     """
 
 
+def makeMathMasters():
+    """ Masters on a weight and width grid as MathInfo and MathGlyph objects.
+        The bold master has no capHeight, the glyphs have a note and a lib.
+    """
+    masters = [
+        (Location(weight=0, width=0), "regular", 700, 650),
+        (Location(weight=1), "bold", 800, None),
+        (Location(width=1), "wide", 750, 600),
+        (Location(weight=1, width=1), "boldwide", 850, 700),
+        ]
+    infoItems = []
+    glyphItems = []
+    for loc, name, ascender, capHeight in masters:
+        font = Font()
+        font.info.unitsPerEm = 1000
+        font.info.ascender = ascender
+        font.info.capHeight = capHeight
+        infoItems.append((loc, MathInfo(font.info)))
+        glyph = font.newGlyph("a")
+        glyph.width = ascender
+        glyph.note = name
+        glyph.lib["master"] = name
+        glyphItems.append((loc, MathGlyph(glyph)))
+    return infoItems, glyphItems
+
+
+def test_gridFontMath():
+    """ The grid gives the same MathInfo and MathGlyph instances as the deltas,
+    also for None values and the attributes that come from the neutral.
+
+    >>> infoItems, glyphItems = makeMathMasters()
+    >>> locations = [Location(weight=-0.5), Location(weight=0.5), Location(weight=0.3, width=0.6), Location(weight=(0.2, 0.7))]
+    >>> bias, deltas = buildMutator(infoItems)
+    >>> bias, grid = buildMutator(infoItems, grid=True)
+    >>> grid.isGrid(), deltas.isGrid()
+    (True, False)
+    >>> info = lambda i: (i.ascender, i.capHeight)
+    >>> [info(i) for i in map(deltas.makeInstance, locations)]
+    [(650.0, 275.0), (750.0, 1025.0), (760.0, 728.0), (770.0, 1175.0)]
+    >>> [info(i) for i in map(grid.makeInstance, locations)] == [info(i) for i in map(deltas.makeInstance, locations)]
+    True
+    >>> bias, deltas = buildMutator(glyphItems)
+    >>> bias, grid = buildMutator(glyphItems, grid=True)
+    >>> glyph = lambda g: (g.width, g.note, g.lib["master"])
+    >>> [glyph(g) for g in map(deltas.makeInstance, locations[:3])]
+    [(650.0, 'regular', 'regular'), (750.0, 'boldwide', 'boldwide'), (760.0, 'boldwide', 'boldwide')]
+    >>> [glyph(g) for g in map(grid.makeInstance, locations[:3])] == [glyph(g) for g in map(deltas.makeInstance, locations[:3])]
+    True
+    """
+
+
+def test_masterWeightsFontMath():
+    """ Adding up the weighted masters gives the same MathInfo and MathGlyph
+    instances as the deltas.
+
+    >>> infoItems, glyphItems = makeMathMasters()
+    >>> locations = [Location(weight=-0.5), Location(weight=0.5), Location(weight=0.3, width=0.6), Location(weight=(0.2, 0.7))]
+    >>> bias, deltas = buildMutator(infoItems)
+    >>> bias, weights = buildMutator(infoItems, masterWeights=True)
+    >>> info = lambda i: (i.ascender, i.capHeight)
+    >>> [info(i) for i in map(weights.makeInstance, locations)] == [info(i) for i in map(deltas.makeInstance, locations)]
+    True
+    >>> bias, deltas = buildMutator(glyphItems)
+    >>> bias, weights = buildMutator(glyphItems, masterWeights=True)
+    >>> glyph = lambda g: (g.width, g.note, g.lib["master"])
+    >>> [glyph(g) for g in map(weights.makeInstance, locations[:3])] == [glyph(g) for g in map(deltas.makeInstance, locations[:3])]
+    True
+    """
+
+
 if __name__ == "__main__":
     import doctest
     sys.exit(doctest.testmod().failed)
@@ -133,6 +133,19 @@ def test1():
         # check the feature text was copied from the source
     >>> assert "Hi_this_is_the_feature." in instance.features.text
 
+        # a writer class without a bender argument gets the bender of the document
+    >>> from mutatorMath.ufo.instance import InstanceWriter
+    >>> class OldInstanceWriter(InstanceWriter):
+    ...     writers = []
+    ...     def __init__(self, path, ufoVersion=1, roundGeometry=False, axes=None, verbose=False, logger=None, bendLocations=False):
+    ...         InstanceWriter.__init__(self, path, ufoVersion, roundGeometry, axes, verbose, logger, bendLocations)
+    ...         self.writers.append(self)
+    >>> doc = DesignSpaceDocumentReader(documentPath, ufoVersion, roundGeometry=roundGeometry, verbose=True, logPath=logPath)
+    >>> doc._instanceWriterClass = OldInstanceWriter
+    >>> doc.process(makeGlyphs=True, makeKerning=False, makeInfo=False)
+    >>> [writer.bender is doc.bender for writer in OldInstanceWriter.writers]
+    [True]
+
         # basic kerning processing.
     >>> documentPath = os.path.join(testRoot, 'exporttest_kerning.designspace')
     >>> doc = DesignSpaceDocumentWriter(documentPath, verbose=True)
@@ -430,6 +443,11 @@ def test1():
                'name': 'width',
                'tag': 'wdth'}}
 
+    # one bender for the whole document
+    >>> from mutatorMath.objects.location import Location
+    >>> doc.bender(Location(weight=150, width=500))
+    <Location weight:197.500, width:500 >
+
     >>> doc.process(makeGlyphs=False, makeKerning=False, makeInfo=False)
     """
 
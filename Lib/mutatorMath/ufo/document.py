@@ -10,6 +10,7 @@ import defcon
 from mutatorMath.objects.error import MutatorError
 from mutatorMath.objects.location import Location
 from mutatorMath.objects.mutator import Mutator
+from mutatorMath.objects.bender import Bender
 from mutatorMath.ufo.instance import InstanceWriter
 
 
@@ -407,6 +408,8 @@ class DesignSpaceDocumentReader(object):
         self.readAxes()
         self.readWarp()
         self.readSources()
+        # one bender for all instances and mutators of this document
+        self.bender = Bender(self.axes)
 
     def reportProgress(self, state, action, text=None, tick=None):
         """ If we want to keep other code updated about our progress.
@@ -703,6 +706,9 @@ class DesignSpaceDocumentReader(object):
             logger=self.logger,
             bendLocations=bendLocations,
         )
+        # one bender for all instances, set here so writer classes
+        # without a bender argument still work
+        instanceObject.bender = self.bender
         self.results[filenameTokenForResults] = instancePath
 
         # set the masters
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from mutatorMath.objects.error import MutatorError
+from mutatorMath.objects.location import FrozenLocation
 from mutatorMath.objects.mutator import Mutator, buildMutator
 from mutatorMath.objects.bender import Bender, noBend
 
@@ -42,6 +43,7 @@ class InstanceWriter(object):
             verbose=False,
             logger=None,
             bendLocations=False,
+            bender=None,
         ):
         self.path = path
         self.font = self._fontClass()
@@ -52,6 +54,12 @@ class InstanceWriter(object):
             self.axes = axes
         else:
             self.axes = {}
+        # one bender for all mutators of this instance
+        if bender is not None:
+            self.bender = bender
+        else:
+            self.bender = Bender(self.axes)
+        self._bentLocations = {}
         self.sources = {} 
         self.muted = dict(kerning=[], info=[], glyphs={})   # muted data in the masters
         self.mutedGlyphsNames = []                          # muted glyphs in the instance
@@ -183,6 +191,16 @@ class InstanceWriter(object):
     def setLocation(self, locationObject):
         """ Set the location directly. """
         self.locationObject = locationObject
+
+    def _getInstanceLocation(self, instanceLocation):
+        """ Return the location for makeInstance, bent once if bendLocations is set. """
+        if not self.bendLocations:
+            return instanceLocation
+        key = FrozenLocation(instanceLocation)
+        bent = self._bentLocations.get(key)
+        if bent is None:
+            bent = self._bentLocations[key] = self.bender(key)
+        return bent
     
     def addInfo(self, instanceLocation=None, sources=None, copySourceName=None):
         """ Add font info data. """
@@ -199,12 +217,12 @@ class InstanceWriter(object):
                 continue
             items.append((sourceLocation, MathInfo(source.info)))
         try:
-            bias, m = buildMutator(items, axes=self.axes)
+            bias, m = buildMutator(items, bender=self.bender)
         except:
             if self.logger:
                 self.logger.exception("Error processing font info. %s", items)
             return
-        instanceObject = m.makeInstance(instanceLocation, bend=self.bendLocations)
+        instanceObject = m.makeInstance(self._getInstanceLocation(instanceLocation))
         if self.roundGeometry:
             try:
                 instanceObject = instanceObject.round()
@@ -300,12 +318,12 @@ class InstanceWriter(object):
         if items:
             m = None
             try:
-                bias, m = buildMutator(items, axes=self.axes)
+                bias, m = buildMutator(items, bender=self.bender)
             except:
                 if self.logger:
                     self.logger.exception("\tError processing kerning data. %s", items)
                 return
-            instanceObject = m.makeInstance(instanceLocation, bend=self.bendLocations)
+            instanceObject = m.makeInstance(self._getInstanceLocation(instanceLocation))
             if self.roundGeometry:
                 instanceObject.round()
             instanceObject.extractKerning(self.font)
@@ -370,8 +388,8 @@ class InstanceWriter(object):
                 continue
             glyphObject = MathGlyph(fontObject[glyphName])
             items.append((locationObject, glyphObject))
-        bias, m = buildMutator(items, axes=self.axes)
-        instanceObject = m.makeInstance(instanceLocationObject, bend=self.bendLocations)
+        bias, m = buildMutator(items, bender=self.bender)
+        instanceObject = m.makeInstance(self._getInstanceLocation(instanceLocationObject))
         if self.roundGeometry:
             try:
                 instanceObject = instanceObject.round()
@@ -199,6 +199,9 @@ setup(
         "defcon>=0.3.5",
         "fontMath>=0.4.8",
     ],
+    extras_require={
+        "numpy": ["numpy"],
+    },
     cmdclass={
         "release": release,
         "bump_version": bump_version,